@@ -1,24 +1,45 @@
-from flask import Flask
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from models.user import db, bcrypt
+from models.user import db, bcrypt, upgrade_schema
 from config import Config
+from utils.history_writer import history_writer
+from utils.metrics import metrics, REQUEST_LATENCY
+from utils.profiler import start_continuous_sampler
+from utils.user_cache import user_cache
+from utils.response_encoding import OrjsonProvider, orjson
 import os
+import time
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Faster JSON serialization when orjson is installed
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    
     # Initialize extensions
     CORS(app)
     db.init_app(app)
     bcrypt.init_app(app)
-    JWTManager(app)
+    jwt = JWTManager(app)
+    user_cache.init_app(app)
+    
+    # Tokens of deleted users (or of an earlier holder of a reused id) are
+    # rejected, checked against cached records
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_payload):
+        return user_cache.is_revoked(jwt_payload)
     
     # Create upload directory
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs('database', exist_ok=True)
     
+    # Optional always-on low-rate stack sampling
+    if app.config['PROFILER_CONTINUOUS_ENABLED']:
+        start_continuous_sampler(app.config['PROFILER_CONTINUOUS_INTERVAL'])
+    
     # Register blueprints
     from routes.auth import auth_bp
     from routes.detection import detection_bp
@@ -31,8 +52,34 @@ def create_app():
     # Create tables
     with app.app_context():
         db.create_all()
+        upgrade_schema()
         print("Database tables created successfully!")
     
+    # Batched search history inserts
+    history_writer.init_app(app)
+    
+    # Request latency instrumentation
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+    
+    @app.after_request
+    def record_request_latency(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            REQUEST_LATENCY.observe(
+                request.endpoint or 'unmatched',
+                request.method,
+                response.status_code,
+                value=time.perf_counter() - start
+            )
+        return response
+    
+    # Prometheus scrape endpoint
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
     # Welcome route
     @app.route('/')
     def index():
@@ -42,7 +89,8 @@ def create_app():
             'endpoints': {
                 'auth': '/api/auth',
                 'detection': '/api/detection',
-                'admin': '/api/admin'
+                'admin': '/api/admin',
+                'metrics': '/metrics'
             }
         }
     
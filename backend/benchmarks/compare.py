@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Usage (from the backend directory):
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exits with status 1 when any stage's median got slower than the
+threshold (in percent), so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(r['pipeline'], r['case'], r['stage']): r for r in report['results']}
+
+
+def compare(baseline_path, candidate_path, threshold=10.0, min_ms=0.5):
+    """
+    Compare median timings per (pipeline, case, stage)
+    Stages faster than min_ms in both runs are ignored as noise.
+    Returns: List of regression rows
+    """
+    baseline_report, baseline = load_results(baseline_path)
+    candidate_report, candidate = load_results(candidate_path)
+
+    print(f"Baseline:  {baseline_report['environment'].get('git_commit')}")
+    print(f"Candidate: {candidate_report['environment'].get('git_commit')}\n")
+    print(f"{'pipeline':<8} {'case':<22} {'stage':<16} {'base ms':>10} {'new ms':>10} {'change':>8}")
+
+    regressions = []
+    for key in sorted(set(baseline) & set(candidate)):
+        old = baseline[key]['median_ms']
+        new = candidate[key]['median_ms']
+        change = ((new - old) / old * 100) if old > 0 else 0.0
+
+        flag = ''
+        if max(old, new) >= min_ms and change > threshold:
+            flag = '  REGRESSION'
+            regressions.append({'pipeline': key[0], 'case': key[1], 'stage': key[2],
+                                'baseline_ms': old, 'candidate_ms': new, 'change_pct': change})
+
+        print(f"{key[0]:<8} {key[1]:<22} {key[2]:<16} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+
+    for key in sorted(set(baseline) ^ set(candidate)):
+        side = 'baseline' if key in baseline else 'candidate'
+        print(f"{key[0]:<8} {key[1]:<22} {key[2]:<16} only in {side}")
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Allowed slowdown in percent')
+    parser.add_argument('--min-ms', type=float, default=0.5, help='Ignore stages faster than this')
+    args = parser.parse_args()
+
+    regressions = compare(args.baseline, args.candidate, args.threshold, args.min_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.threshold}%")
+        sys.exit(1)
+    print("\n✅ No regressions")
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Video decode backend benchmark: OpenCV vs PyAV on 1080p and 4K inputs.
+
+Generates inter-coded MPEG-4 test videos, then times opening the file and
+reading its metadata, uniform sampling and adaptive sampling through
+VideoProcessor with each backend. Backends that are not installed are
+skipped.
+
+Usage (from the backend directory):
+    python -m benchmarks.decode_backends --output decode.json
+    python -m benchmarks.decode_backends --seconds 5 --repeat 3
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.run_benchmarks import environment_info, measure
+from benchmarks.synthetic import write_video
+from utils.video_backends import VIDEO_BACKENDS, av
+from utils.video_processor import VideoProcessor
+
+DECODE_CASES = [
+    ('1080p', 1920, 1080),
+    ('4k', 3840, 2160),
+]
+
+
+def bench_backend(backend, path, repeat, max_frames):
+    """
+    Time one backend on one video
+    Returns: Dictionary of stage name -> summary
+    """
+    stages = {}
+    for sampler in ('uniform', 'adaptive'):
+        processor = VideoProcessor(sampler=sampler, backend=backend)
+        if sampler == 'uniform':
+            stages['probe'], info = measure(lambda: processor.get_video_info(path), repeat)
+            stages['probe']['frame_count'] = info['frame_count']
+        stages[f'sample_{sampler}'], frames = measure(
+            lambda: processor.extract_frames(path, max_frames=max_frames), repeat)
+        stages[f'sample_{sampler}']['frames'] = len(frames)
+    return stages
+
+
+def run(output, repeat=3, seconds=10, data_dir=None, max_frames=30):
+    backends = [b for b in VIDEO_BACKENDS if b != 'pyav' or av is not None]
+    if 'pyav' not in backends:
+        print("PyAV is not installed; only the OpenCV backend will be measured")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = data_dir or tmp_dir
+        os.makedirs(data_dir, exist_ok=True)
+
+        for name, width, height in DECODE_CASES:
+            path = os.path.join(data_dir, f"decode_{name}.mp4")
+            print(f"Generating {name} video ({seconds}s)...")
+            write_video(path, width, height, seconds, with_face=True, fourcc='mp4v')
+
+            for backend in backends:
+                print(f"Measuring {backend} on {name}...")
+                for stage, summary in bench_backend(backend, path, repeat, max_frames).items():
+                    results.append({'case': name, 'backend': backend, 'stage': stage, **summary})
+
+    report = {
+        'environment': environment_info(),
+        'settings': {'repeat': repeat, 'seconds': seconds, 'max_frames': max_frames},
+        'results': results
+    }
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'case':<8} {'backend':<8} {'stage':<18} {'median ms':>10} {'p95 ms':>10}")
+    for r in results:
+        print(f"{r['case']:<8} {r['backend']:<8} {r['stage']:<18} {r['median_ms']:>10.2f} {r['p95_ms']:>10.2f}")
+    print(f"\n✅ Results written to {output}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare video decode backends')
+    parser.add_argument('--output', default='decode_results.json')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seconds', type=int, default=10, help='Length of each generated video')
+    parser.add_argument('--data-dir', help='Keep generated inputs in this directory')
+    parser.add_argument('--max-frames', type=int, default=30)
+    args = parser.parse_args()
+
+    run(args.output, repeat=args.repeat, seconds=args.seconds, data_dir=args.data_dir, max_frames=args.max_frames)
\ No newline at end of file
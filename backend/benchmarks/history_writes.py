@@ -0,0 +1,87 @@
+"""
+Search history write throughput: one commit per analysis vs the
+write-behind recorder's group commits.
+
+Starts a throwaway app on a temporary SQLite database and records rows from
+several threads at once, the way concurrent analysis requests do.
+
+Usage (from the backend directory):
+    python -m benchmarks.history_writes --rows 2000 --threads 8
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+from config import Config
+from models.user import db, User
+from utils.history_writer import HistoryWriter
+
+
+def make_app(db_path, write_behind):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['HISTORY_WRITE_BEHIND_ENABLED'] = write_behind
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', role='user')
+        user.password_hash = 'x'
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def run_case(write_behind, rows, threads):
+    """
+    Record rows from threads concurrently
+    Returns: Rows per second, including the final flush
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = make_app(os.path.join(tmp_dir, 'history.db'), write_behind)
+        writer = HistoryWriter()
+        writer.init_app(app)
+
+        def worker(count):
+            with app.app_context():
+                for i in range(count):
+                    writer.record(
+                        user_id=1,
+                        file_name=f'bench_{i}.jpg',
+                        file_type='image',
+                        detection_result='real',
+                        confidence_score=0.9,
+                        file_path=None,
+                        model_version='bench'
+                    )
+                db.session.remove()
+
+        start = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(rows // threads,)) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        writer.flush()
+        elapsed = time.perf_counter() - start
+        writer.close()
+
+        with app.app_context():
+            db.engine.dispose()
+        return (rows // threads) * threads / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare search history write paths')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    direct = run_case(False, args.rows, args.threads)
+    batched = run_case(True, args.rows, args.threads)
+    print(f"commit per row: {direct:10.0f} rows/s")
+    print(f"write-behind:   {batched:10.0f} rows/s ({batched / direct:.1f}x)")
@@ -0,0 +1,332 @@
+"""
+End-to-end load test for the Flask API.
+
+Each virtual user signs up, logs in, then issues a weighted mix of image
+analyses, video analyses, history and stats polls until the run ends.
+Reports throughput, p50/p95/p99 latency and error rate per endpoint, and
+SQLite lock contention.
+
+Usage (from the backend directory):
+    # In-process app with a throwaway database
+    python -m benchmarks.load_test --users 8 --duration 30
+
+    # Against a server you started yourself (python app.py)
+    python -m benchmarks.load_test --url http://localhost:5000 --users 8
+
+In-process runs turn off per-user rate limits and size the admission pools
+to the number of users, so the latencies time the analyses rather than
+429/503 rejections. Pass --rate-limits and/or --admission to keep the
+configured limits instead.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import cv2
+
+from benchmarks.synthetic import make_image, write_video
+
+DEFAULT_MIX = 'image=3,video=1,history=4,stats=2'
+
+ENDPOINTS = {
+    'image': ('POST', '/api/detection/analyze/image'),
+    'video': ('POST', '/api/detection/analyze/video'),
+    'history': ('GET', '/api/detection/history'),
+    'stats': ('GET', '/api/detection/stats'),
+}
+
+
+def parse_mix(mix):
+    """Parse 'image=3,video=1' into a weights dictionary"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class InProcessTarget:
+    """
+    Drives a fresh app instance through Flask test clients, with its own
+    temporary database, upload folder, caches and profiles.
+    users: number of virtual users the admission pools are sized for
+    rate_limits: keep the configured per-user rate limits
+    admission: keep the configured admission pool sizes
+    """
+
+    def __init__(self, users, rate_limits=False, admission=False):
+        from config import Config
+
+        self.tmp_dir = tempfile.mkdtemp(prefix='deepfake-load-')
+        Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp_dir, 'load.db')}"
+        Config.UPLOAD_FOLDER = os.path.join(self.tmp_dir, 'uploads')
+        Config.FRAME_CACHE_DIR = os.path.join(self.tmp_dir, 'cache', 'frames')
+        Config.THUMBNAIL_CACHE_DIR = os.path.join(self.tmp_dir, 'cache', 'thumbnails')
+        Config.PROFILE_FOLDER = os.path.join(self.tmp_dir, 'profiles')
+        Config.RATE_LIMIT_DB = os.path.join(self.tmp_dir, 'rate_limits.db')
+
+        Config.RATE_LIMIT_ENABLED = rate_limits
+        if not admission:
+            # Each user has at most one request in flight, so no request
+            # waits for a slot or is turned away
+            Config.IMAGE_MAX_CONCURRENT = Config.IMAGE_MAX_QUEUED = users
+            Config.VIDEO_MAX_CONCURRENT = Config.VIDEO_MAX_QUEUED = users
+
+        from app import create_app
+        self.app = create_app()
+        self.write_timings = []
+        self._timings_lock = threading.Lock()
+        self._watch_writes()
+
+    def _watch_writes(self):
+        """Time every write statement; slow writes are waiting on the SQLite lock"""
+        from sqlalchemy import event
+        from models.user import db
+
+        with self.app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info['query_start'].pop()
+            if statement.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+                with self._timings_lock:
+                    self.write_timings.append(elapsed)
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(method, path, headers=None, json_body=None, files=None):
+            data = None
+            if files:
+                data = {name: (io.BytesIO(content), filename) for name, (filename, content) in files.items()}
+            response = client.open(path, method=method, headers=headers, json=json_body, data=data)
+            return response.status_code, response.get_json(silent=True) or {}
+
+        return send
+
+    def close(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class HttpTarget:
+    """Drives an already running server over HTTP"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.write_timings = None
+
+    def session(self):
+        import requests
+
+        http = requests.Session()
+
+        def send(method, path, headers=None, json_body=None, files=None):
+            response = http.request(method, self.base_url + path, headers=headers, json=json_body,
+                                    files=files, timeout=600)
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            return response.status_code, body
+
+        return send
+
+    def close(self):
+        pass
+
+
+def build_payloads(tmp_dir):
+    """Encode one synthetic image and one short video for uploads"""
+    ok, encoded = cv2.imencode('.jpg', make_image(1280, 720, with_face=True))
+    image_bytes = encoded.tobytes()
+
+    video_path = os.path.join(tmp_dir, 'load.avi')
+    write_video(video_path, 640, 360, seconds=3, with_face=True)
+    with open(video_path, 'rb') as f:
+        video_bytes = f.read()
+
+    return image_bytes, video_bytes
+
+
+def virtual_user(target, weights, deadline, max_requests, payloads, records, lock, seed):
+    rng = random.Random(seed)
+    send = target.session()
+    username = f"load_{uuid.uuid4().hex[:10]}"
+    password = 'loadtest123'
+
+    def timed(name, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            status, body = send(method, path, **kwargs)
+            error = body.get('error') if status >= 400 else None
+        except Exception as e:
+            status, body, error = 0, {}, str(e)
+        elapsed = time.perf_counter() - start
+        with lock:
+            records.append((name, status, elapsed, error))
+        return status, body
+
+    timed('signup', 'POST', '/api/auth/signup',
+          json_body={'username': username, 'email': f"{username}@example.com", 'password': password})
+    status, body = timed('login', 'POST', '/api/auth/login',
+                         json_body={'username': username, 'password': password})
+    if status != 200:
+        return
+
+    headers = {'Authorization': f"Bearer {body['access_token']}"}
+    image_bytes, video_bytes = payloads
+    names, name_weights = list(weights), list(weights.values())
+
+    sent = 0
+    while time.monotonic() < deadline and (max_requests is None or sent < max_requests):
+        name = rng.choices(names, weights=name_weights)[0]
+        method, path = ENDPOINTS[name]
+        if name == 'image':
+            timed(name, method, path, headers=headers, files={'file': ('load.jpg', image_bytes)})
+        elif name == 'video':
+            timed(name, method, path, headers=headers, files={'file': ('load.avi', video_bytes)})
+        else:
+            timed(name, method, path, headers=headers)
+        sent += 1
+
+
+def report(records, wall_time, write_timings):
+    by_endpoint = defaultdict(list)
+    for record in records:
+        by_endpoint[record[0]].append(record)
+
+    summary = {'wall_time_s': wall_time, 'total_requests': len(records),
+               'throughput_rps': len(records) / wall_time if wall_time else 0.0, 'endpoints': {}}
+
+    print(f"\n{'endpoint':<10} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name in sorted(by_endpoint):
+        rows = by_endpoint[name]
+        latencies = sorted(r[2] * 1000 for r in rows)
+        errors = sum(1 for r in rows if r[1] == 0 or r[1] >= 400)
+        stats = {
+            'count': len(rows),
+            'rps': len(rows) / wall_time if wall_time else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': latencies[-1],
+            'error_rate': errors / len(rows)
+        }
+        summary['endpoints'][name] = stats
+        print(f"{name:<10} {stats['count']:>7} {stats['rps']:>8.2f} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {errors:>7}")
+
+    locked = sum(1 for r in records if r[3] and 'database is locked' in r[3])
+    contention = {'locked_errors': locked}
+    if write_timings:
+        ordered = sorted(t * 1000 for t in write_timings)
+        contention.update({
+            'write_statements': len(ordered),
+            'write_p50_ms': percentile(ordered, 50),
+            'write_p99_ms': percentile(ordered, 99),
+            'write_max_ms': ordered[-1]
+        })
+    summary['sqlite_contention'] = contention
+
+    print(f"\nThroughput: {summary['throughput_rps']:.2f} req/s over {wall_time:.1f}s")
+    print(f"SQLite: {locked} 'database is locked' errors", end='')
+    if write_timings:
+        print(f", write p50 {contention['write_p50_ms']:.1f}ms / p99 {contention['write_p99_ms']:.1f}ms "
+              f"/ max {contention['write_max_ms']:.1f}ms over {contention['write_statements']} statements")
+    else:
+        print()
+
+    errors = defaultdict(int)
+    for record in records:
+        if record[3]:
+            errors[f"{record[0]}: {record[3][:120]}"] += 1
+    if errors:
+        print("\nErrors:")
+        for message, count in sorted(errors.items(), key=lambda item: -item[1])[:10]:
+            print(f"  {count:>5}  {message}")
+
+    return summary
+
+
+def run(url=None, users=4, duration=30.0, requests_per_user=None, mix=DEFAULT_MIX, seed=0, output=None,
+        rate_limits=False, admission=False):
+    weights = parse_mix(mix)
+    target = HttpTarget(url) if url else InProcessTarget(users, rate_limits, admission)
+    payload_dir = tempfile.mkdtemp(prefix='deepfake-payload-')
+
+    try:
+        payloads = build_payloads(payload_dir)
+        records, lock = [], threading.Lock()
+        deadline = time.monotonic() + duration
+
+        print(f"Running {users} users for {duration}s against {url or 'in-process app'} (mix: {mix})")
+        threads = [
+            threading.Thread(target=virtual_user, args=(target, weights, deadline, requests_per_user,
+                                                         payloads, records, lock, seed + i))
+            for i in range(users)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - start
+
+        summary = report(records, wall_time, target.write_timings)
+        summary['settings'] = {'url': url, 'users': users, 'duration': duration,
+                               'requests_per_user': requests_per_user, 'mix': mix,
+                               'rate_limits': rate_limits, 'admission': admission}
+
+        if output:
+            with open(output, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"\n✅ Results written to {output}")
+        return summary
+
+    finally:
+        shutil.rmtree(payload_dir, ignore_errors=True)
+        target.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the deepfake detection API')
+    parser.add_argument('--url', help='Base URL of a running server; omit to test in-process')
+    parser.add_argument('--users', type=int, default=4, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--requests-per-user', type=int, help='Stop each user after this many requests')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted request mix (default {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    parser.add_argument('--rate-limits', action='store_true',
+                        help='In-process: keep the configured per-user rate limits')
+    parser.add_argument('--admission', action='store_true',
+                        help='In-process: keep the configured admission pool sizes')
+    args = parser.parse_args()
+
+    run(args.url, args.users, args.duration, args.requests_per_user, args.mix, args.seed, args.output,
+        args.rate_limits, args.admission)
\ No newline at end of file
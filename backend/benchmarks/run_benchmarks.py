@@ -0,0 +1,173 @@
+"""
+Stage-level benchmarks for the image and video pipelines.
+
+Generates synthetic inputs, times every stage of ImageProcessor,
+VideoProcessor and the (stand-in) detector, and writes JSON results that
+compare.py can diff between commits.
+
+Usage (from the backend directory):
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --quick --repeat 3
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from benchmarks.stand_in_model import StandInDetector
+from benchmarks.synthetic import generate_dataset
+from utils.image_processor import ImageProcessor
+from utils.video_processor import VideoProcessor
+
+# Short side the app's face and quality stages need (see Config)
+REDUCED_DECODE_MIN_SIDE = 720
+
+
+def summarize(samples):
+    """Summary statistics for a list of durations in seconds"""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'repeat': len(samples),
+        'min_ms': ordered[0] * 1000,
+        'median_ms': statistics.median(ordered) * 1000,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p95_ms': ordered[p95_index] * 1000,
+        'stdev_ms': (statistics.stdev(ordered) * 1000) if len(ordered) > 1 else 0.0
+    }
+
+
+def measure(fn, repeat, warmup=1):
+    """
+    Time fn() repeat times after warmup calls
+    Returns: (summary dict, result of the last call)
+    """
+    result = None
+    for _ in range(warmup):
+        result = fn()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+
+    return summarize(samples), result
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def bench_images(cases, repeat, image_processor, detector):
+    results = []
+    for case in cases:
+        path = case['path']
+        print(f"  image {case['case']}")
+
+        stages = {}
+        stages['decode'], img = measure(lambda: image_processor.load_image(path), repeat)
+        stages['decode_reduced'], _ = measure(
+            lambda: image_processor.decode_image(path, min_side=REDUCED_DECODE_MIN_SIDE), repeat)
+        stages['quality'], _ = measure(lambda: image_processor.analyze_image_quality(img), repeat)
+        stages['preprocess'], processed = measure(lambda: image_processor.preprocess_image(img), repeat)
+        stages['face_detection'], faces = measure(lambda: image_processor.extract_faces(img), repeat)
+        stages['inference'], _ = measure(lambda: detector.predict_image(processed), repeat)
+        stages['end_to_end'], _ = measure(lambda: detector.predict_image(
+            image_processor.preprocess_image(image_processor.load_image(path))), repeat)
+
+        for stage, summary in stages.items():
+            results.append({'pipeline': 'image', 'case': case['case'], 'stage': stage,
+                            'faces_found': len(faces), **summary})
+    return results
+
+
+def bench_videos(cases, repeat, video_processor, detector, max_frames):
+    results = []
+    for case in cases:
+        path = case['path']
+        print(f"  video {case['case']}")
+
+        stages = {}
+        stages['probe'], _ = measure(lambda: video_processor.get_video_info(path), repeat)
+        stages['extract_frames'], frames = measure(
+            lambda: video_processor.extract_frames(path, max_frames=max_frames), repeat)
+        stages['preprocess'], processed = measure(lambda: video_processor.preprocess_frames(frames), repeat)
+        stages['inference'], _ = measure(lambda: detector.predict_video(processed), repeat)
+        stages['frame_analysis'], _ = measure(lambda: detector.analyze_frames(processed), repeat)
+        stages['quality'], _ = measure(lambda: video_processor.analyze_video_quality(path), repeat)
+        stages['face_extraction'], faces = measure(
+            lambda: video_processor.extract_faces_from_video(path, max_frames=10), repeat)
+
+        for stage, summary in stages.items():
+            results.append({'pipeline': 'video', 'case': case['case'], 'stage': stage,
+                            'frames': len(frames), 'faces_found': len(faces), **summary})
+    return results
+
+
+def run(output, repeat=5, quick=False, data_dir=None, max_frames=30):
+    image_processor = ImageProcessor()
+    video_processor = VideoProcessor()
+    detector = StandInDetector()
+    detector.load_model()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = data_dir or tmp_dir
+        print(f"Generating synthetic inputs in {data_dir}...")
+        dataset = generate_dataset(data_dir, quick=quick)
+
+        print("Running benchmarks...")
+        results = bench_images(dataset['images'], repeat, image_processor, detector)
+        results += bench_videos(dataset['videos'], repeat, video_processor, detector, max_frames)
+
+    report = {
+        'environment': environment_info(),
+        'settings': {'repeat': repeat, 'quick': quick, 'max_frames': max_frames},
+        'results': results
+    }
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'pipeline':<8} {'case':<22} {'stage':<16} {'median ms':>10} {'p95 ms':>10}")
+    for r in results:
+        print(f"{r['pipeline']:<8} {r['case']:<22} {r['stage']:<16} {r['median_ms']:>10.2f} {r['p95_ms']:>10.2f}")
+    print(f"\n✅ Results written to {output}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark image and video pipeline stages')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help='Only the smallest cases')
+    parser.add_argument('--data-dir', help='Keep generated inputs in this directory')
+    parser.add_argument('--max-frames', type=int, default=30)
+    args = parser.parse_args()
+
+    run(args.output, repeat=args.repeat, quick=args.quick, data_dir=args.data_dir, max_frames=args.max_frames)
\ No newline at end of file
@@ -0,0 +1,92 @@
+import numpy as np
+
+from models.cnn_model import DeepfakeDetector, summarize_frame_results
+
+
+class StandInDetector(DeepfakeDetector):
+    """
+    Deterministic stand-in for the CNN used by the benchmarks.
+
+    The placeholder DeepfakeDetector returns random numbers without touching
+    its input, which makes inference look free. This model runs a fixed,
+    seeded patch-embedding network in numpy with roughly the per-image
+    arithmetic of a small mobile CNN (~0.5 GFLOP at 224x224), and always
+    produces the same output for the same input.
+    """
+
+    def __init__(self, model_path=None, version='stand-in', patch_size=16,
+                 embed_dim=768, hidden_dim=512, depth=1, seed=1234):
+        super().__init__(model_path, version=version)
+        self.patch_size = patch_size
+        self.embed_dim = embed_dim
+        self.hidden_dim = hidden_dim
+        self.depth = depth
+        self.seed = seed
+        self.weights = None
+
+    def load_model(self):
+        rng = np.random.default_rng(self.seed)
+        patch_dim = self.patch_size * self.patch_size * 3
+
+        def layer(n_in, n_out):
+            return (rng.standard_normal((n_in, n_out), dtype=np.float32) / np.sqrt(n_in)).astype(np.float32)
+
+        self.weights = {
+            'embed': layer(patch_dim, self.embed_dim),
+            'blocks': [(layer(self.embed_dim, self.hidden_dim), layer(self.hidden_dim, self.embed_dim))
+                       for _ in range(self.depth)],
+            'head': layer(self.embed_dim, 1)
+        }
+        self.is_loaded = True
+        return True
+
+    def _fake_probabilities(self, batch):
+        """
+        Run the network on a (N, H, W, 3) batch
+        Returns: float32 array of N fake probabilities
+        """
+        batch = self.prepare_input(batch)
+        if batch.ndim == 3:
+            batch = batch[np.newaxis]
+
+        n, h, w, c = batch.shape
+        p = self.patch_size
+        h, w = h - h % p, w - w % p
+        patches = batch[:, :h, :w, :].reshape(n, h // p, p, w // p, p, c)
+        patches = patches.transpose(0, 1, 3, 2, 4, 5).reshape(n, -1, p * p * c)
+
+        x = patches @ self.weights['embed']
+        for w_in, w_out in self.weights['blocks']:
+            x = x + np.maximum(x @ w_in, 0) @ w_out
+        pooled = x.mean(axis=1)
+        logits = (pooled @ self.weights['head'])[:, 0]
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    @staticmethod
+    def _verdict(probability):
+        is_fake = probability >= 0.5
+        confidence = float(probability if is_fake else 1.0 - probability)
+        return ("fake" if is_fake else "real"), confidence
+
+    def predict_image(self, image_array):
+        return self._verdict(float(self._fake_probabilities(image_array)[0]))
+
+    def predict_video(self, frames_array):
+        return self._verdict(float(self._fake_probabilities(frames_array).mean()))
+
+    def predict_batch(self, batch):
+        return [self._verdict(float(p)) for p in self._fake_probabilities(batch)]
+
+    def analyze_frames(self, frames_array, frame_numbers=None):
+        probabilities = self._fake_probabilities(frames_array)
+
+        frame_results = []
+        for i, probability in enumerate(probabilities):
+            prediction, confidence = self._verdict(float(probability))
+            frame_results.append({
+                'frame_number': int(frame_numbers[i] if frame_numbers is not None else i),
+                'prediction': prediction,
+                'confidence': confidence
+            })
+
+        return summarize_frame_results(frame_results)
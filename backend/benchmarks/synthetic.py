@@ -0,0 +1,118 @@
+import os
+
+import cv2
+import numpy as np
+
+# (name, width, height)
+IMAGE_RESOLUTIONS = [
+    ('vga', 640, 480),
+    ('1080p', 1920, 1080),
+    ('12mp', 4000, 3000),
+]
+
+# (name, width, height, seconds)
+VIDEO_CASES = [
+    ('480p_2s', 854, 480, 2),
+    ('720p_10s', 1280, 720, 10),
+    ('1080p_10s', 1920, 1080, 10),
+]
+
+VIDEO_FPS = 30
+
+
+def draw_face(img, cx, cy, size):
+    """
+    Draw a frontal face-like pattern that the Haar cascade detects:
+    light oval, dark eyes and brows, lighter nose bridge, mouth.
+    """
+    s = size
+    thickness = max(1, int(0.03 * s))
+    cv2.ellipse(img, (cx, cy), (int(s * 0.5), int(s * 0.65)), 0, 0, 360, (150, 180, 215), -1)
+    for dx in (-0.2, 0.2):
+        eye_x = int(cx + dx * s)
+        cv2.ellipse(img, (eye_x, int(cy - 0.12 * s)), (int(0.09 * s), int(0.045 * s)), 0, 0, 360, (40, 40, 40), -1)
+        cv2.line(img, (int(eye_x - 0.1 * s), int(cy - 0.22 * s)), (int(eye_x + 0.1 * s), int(cy - 0.22 * s)), (30, 30, 30), thickness)
+    cv2.line(img, (cx, int(cy - 0.05 * s)), (cx, int(cy + 0.12 * s)), (110, 140, 180), max(1, int(0.04 * s)))
+    cv2.ellipse(img, (cx, int(cy + 0.28 * s)), (int(0.16 * s), int(0.05 * s)), 0, 0, 360, (60, 60, 140), -1)
+
+
+def make_image(width, height, with_face, seed=0):
+    """
+    Generate a deterministic BGR test image with textured background
+    Returns: uint8 array of shape (height, width, 3)
+    """
+    rng = np.random.default_rng(seed)
+
+    # Low-frequency background plus sensor-like noise
+    small = rng.integers(40, 200, size=(max(2, height // 64), max(2, width // 64), 3), dtype=np.uint8)
+    img = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.normal(0, 6, size=img.shape)
+    img = np.clip(img + noise, 0, 255).astype(np.uint8)
+
+    if with_face:
+        size = min(width, height) // 3
+        draw_face(img, width // 2, height // 2, size)
+        img = cv2.GaussianBlur(img, (5, 5), 0)
+
+    return img
+
+
+def write_image(path, width, height, with_face, seed=0, quality=90):
+    img = make_image(width, height, with_face, seed)
+    cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return path
+
+
+def write_video(path, width, height, seconds, with_face, fps=VIDEO_FPS, seed=0, fourcc='MJPG'):
+    """
+    Write a deterministic video (MJPG unless fourcc says otherwise) with a
+    few hard scene cuts and a slowly drifting face, so samplers see both
+    motion and static shots.
+    """
+    base = make_image(width, height, with_face=False, seed=seed)
+    alt = make_image(width, height, with_face=False, seed=seed + 1)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open video writer for {path}")
+
+    total = int(seconds * fps)
+    face_size = min(width, height) // 3
+    for i in range(total):
+        # Switch scene every 3 seconds
+        frame = (base if (i // (3 * fps)) % 2 == 0 else alt).copy()
+        if with_face:
+            drift = int((i % fps) / fps * width * 0.1)
+            draw_face(frame, width // 2 - width // 20 + drift, height // 2, face_size)
+        writer.write(frame)
+
+    writer.release()
+    return path
+
+
+def generate_dataset(output_dir, quick=False):
+    """
+    Generate all benchmark inputs into output_dir
+    Returns: Dictionary with 'images' and 'videos' lists of case dicts
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    image_resolutions = IMAGE_RESOLUTIONS[:2] if quick else IMAGE_RESOLUTIONS
+    video_cases = VIDEO_CASES[:1] if quick else VIDEO_CASES
+
+    images = []
+    for name, width, height in image_resolutions:
+        for with_face in (False, True):
+            case = f"{name}_{'face' if with_face else 'noface'}"
+            path = os.path.join(output_dir, f"{case}.jpg")
+            write_image(path, width, height, with_face)
+            images.append({'case': case, 'path': path, 'width': width, 'height': height, 'face': with_face})
+
+    videos = []
+    for name, width, height, seconds in video_cases:
+        for with_face in (False, True):
+            case = f"{name}_{'face' if with_face else 'noface'}"
+            path = os.path.join(output_dir, f"{case}.avi")
+            write_video(path, width, height, seconds, with_face)
+            videos.append({'case': case, 'path': path, 'width': width, 'height': height,
+                           'seconds': seconds, 'face': with_face})
+
+    return {'images': images, 'videos': videos}
\ No newline at end of file
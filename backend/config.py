@@ -22,5 +22,154 @@ class Config:
     ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
     
-    # Model path
-    MODEL_PATH = os.path.join(os.path.dirname(BASE_DIR), 'trained_models', 'deepfake_detector.h5')
\ No newline at end of file
+    # Images up to this size are decoded straight from the request body;
+    # the copy kept for history is written to disk in the background
+    IN_MEMORY_IMAGE_MAX_BYTES = int(os.environ.get('IN_MEMORY_IMAGE_MAX_BYTES', 20 * 1024 * 1024))
+    
+    # Reduced-resolution decoding - large JPEGs are decoded at 1/2, 1/4 or 1/8
+    # scale while the short side stays above what the face detection and
+    # quality stages need. Set REDUCED_DECODE_ENABLED=false to always decode
+    # at full resolution. Blur is measured with the short side resized to
+    # QUALITY_MIN_SIDE, so is_blurry is the same at every decode factor.
+    REDUCED_DECODE_ENABLED = os.environ.get('REDUCED_DECODE_ENABLED', 'true').lower() == 'true'
+    FACE_DETECT_MIN_SIDE = int(os.environ.get('FACE_DETECT_MIN_SIDE', 480))
+    QUALITY_MIN_SIDE = int(os.environ.get('QUALITY_MIN_SIDE', 720))
+    
+    # Decoded-frame cache - sampled video frames kept as memory-mapped .npy
+    # files keyed by a SHA-256 of the video and sampling parameters
+    FRAME_CACHE_ENABLED = os.environ.get('FRAME_CACHE_ENABLED', 'true').lower() == 'true'
+    FRAME_CACHE_DIR = os.environ.get('FRAME_CACHE_DIR') or os.path.join(BASE_DIR, 'cache', 'frames')
+    FRAME_CACHE_MAX_BYTES = int(os.environ.get('FRAME_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+    
+    # Video frame sampling - 'adaptive' splits the video into shots and
+    # spreads the frame budget across them, skipping near-duplicate frames;
+    # 'uniform' takes evenly spaced frames
+    FRAME_SAMPLER = os.environ.get('FRAME_SAMPLER', 'adaptive')
+    FRAME_PROBES_PER_FRAME = int(os.environ.get('FRAME_PROBES_PER_FRAME', 4))
+    SHOT_CUT_THRESHOLD = float(os.environ.get('SHOT_CUT_THRESHOLD', 0.1))
+    DUPLICATE_FRAME_THRESHOLD = float(os.environ.get('DUPLICATE_FRAME_THRESHOLD', 1.0))
+    
+    # Video decoding - 'opencv' (cv2.VideoCapture) or 'pyav' (FFmpeg through
+    # PyAV: multi-threaded decoding, scaling and RGB conversion in the
+    # decoder, container metadata). Falls back to OpenCV if PyAV is missing
+    VIDEO_DECODE_BACKEND = os.environ.get('VIDEO_DECODE_BACKEND', 'opencv')
+    VIDEO_DECODE_THREADS = int(os.environ.get('VIDEO_DECODE_THREADS', 0))
+    
+    # Parallel segments - videos of at least SEGMENT_MIN_SECONDS are split
+    # into segments of about SEGMENT_SECONDS that worker processes decode,
+    # sample (SEGMENT_FRAMES each) and score in parallel. SEGMENT_WORKERS=0
+    # starts one worker per CPU
+    SEGMENT_PARALLEL_ENABLED = os.environ.get('SEGMENT_PARALLEL_ENABLED', 'true').lower() == 'true'
+    SEGMENT_WORKERS = int(os.environ.get('SEGMENT_WORKERS', 0))
+    SEGMENT_MIN_SECONDS = float(os.environ.get('SEGMENT_MIN_SECONDS', 300))
+    SEGMENT_SECONDS = float(os.environ.get('SEGMENT_SECONDS', 120))
+    SEGMENT_FRAMES = int(os.environ.get('SEGMENT_FRAMES', 30))
+    
+    # Streaming analysis (SSE) - frames are scored and reported in chunks of
+    # STREAM_FRAME_CHUNK; a keepalive comment is sent after
+    # STREAM_KEEPALIVE_SECONDS without events
+    STREAM_FRAME_CHUNK = int(os.environ.get('STREAM_FRAME_CHUNK', 5))
+    STREAM_KEEPALIVE_SECONDS = float(os.environ.get('STREAM_KEEPALIVE_SECONDS', 15))
+    
+    # Secondary analyses (quality, faces, frames) computed before the analyze
+    # routes respond; the rest are computed on demand by
+    # /history/<id>/details. Clients can override with an 'include' field
+    ANALYZE_INCLUDE = os.environ.get('ANALYZE_INCLUDE', '')
+    
+    # Media serving - uploads are streamed with Range support; thumbnails and
+    # poster frames are rendered on first request and cached on disk. Links
+    # are signed per file and expire after one to two MEDIA_URL_TTL_SECONDS.
+    # USE_X_SENDFILE hands file transfers to a front server (Apache
+    # mod_xsendfile, lighttpd) instead of streaming them from Python
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+    THUMBNAIL_CACHE_DIR = os.environ.get('THUMBNAIL_CACHE_DIR') or os.path.join(BASE_DIR, 'cache', 'thumbnails')
+    THUMBNAIL_MAX_SIDE = int(os.environ.get('THUMBNAIL_MAX_SIDE', 160))
+    POSTER_MAX_SIDE = int(os.environ.get('POSTER_MAX_SIDE', 640))
+    THUMBNAIL_JPEG_QUALITY = int(os.environ.get('THUMBNAIL_JPEG_QUALITY', 80))
+    MEDIA_MAX_AGE_SECONDS = int(os.environ.get('MEDIA_MAX_AGE_SECONDS', 3600))
+    MEDIA_URL_TTL_SECONDS = int(os.environ.get('MEDIA_URL_TTL_SECONDS', 900))
+    
+    # Response encoding for the detection and admin APIs - JSON bodies of at
+    # least RESPONSE_COMPRESS_MIN_BYTES are compressed with brotli (if
+    # installed) or gzip per Accept-Encoding. Clients can also ask for
+    # MessagePack (Accept: application/msgpack) and pick fields with ?fields=
+    RESPONSE_COMPRESSION_ENABLED = os.environ.get('RESPONSE_COMPRESSION_ENABLED', 'true').lower() == 'true'
+    RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+    RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+    RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 4))
+    
+    # Search history write-behind - rows are queued and inserted in one
+    # transaction per flush, at most HISTORY_FLUSH_INTERVAL_MS after they were
+    # recorded. Analysis ids are reserved HISTORY_ID_BLOCK_SIZE at a time
+    HISTORY_WRITE_BEHIND_ENABLED = os.environ.get('HISTORY_WRITE_BEHIND_ENABLED', 'true').lower() == 'true'
+    HISTORY_FLUSH_INTERVAL_MS = float(os.environ.get('HISTORY_FLUSH_INTERVAL_MS', 50))
+    HISTORY_FLUSH_MAX_ROWS = int(os.environ.get('HISTORY_FLUSH_MAX_ROWS', 500))
+    HISTORY_ID_BLOCK_SIZE = int(os.environ.get('HISTORY_ID_BLOCK_SIZE', 100))
+    
+    # User cache - token and admin role checks read user records from an
+    # in-process LRU of USER_CACHE_MAX_ENTRIES instead of the database.
+    # Every worker re-reads the 'users' change counter at most every
+    # USER_CACHE_CHECK_SECONDS (0 checks on every lookup) and drops its
+    # entries when signups, role changes or deletions bumped it
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+    USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', 60))
+    USER_CACHE_CHECK_SECONDS = float(os.environ.get('USER_CACHE_CHECK_SECONDS', 1))
+    
+    # Admission control - per-process limits on concurrent analyses, with a
+    # bounded queue in front of each pool. A full queue answers 429 and a
+    # wait over ADMISSION_MAX_WAIT_SECONDS answers 503, both with Retry-After
+    IMAGE_MAX_CONCURRENT = int(os.environ.get('IMAGE_MAX_CONCURRENT', 8))
+    IMAGE_MAX_QUEUED = int(os.environ.get('IMAGE_MAX_QUEUED', 32))
+    VIDEO_MAX_CONCURRENT = int(os.environ.get('VIDEO_MAX_CONCURRENT', 2))
+    VIDEO_MAX_QUEUED = int(os.environ.get('VIDEO_MAX_QUEUED', 8))
+    ADMISSION_MAX_WAIT_SECONDS = float(os.environ.get('ADMISSION_MAX_WAIT_SECONDS', 15))
+    # Queued requests one user may hold in each pool; slots are handed out
+    # fair-share across users
+    ADMISSION_MAX_QUEUED_PER_USER = int(os.environ.get('ADMISSION_MAX_QUEUED_PER_USER', 4))
+    
+    # Per-user rate limits - token buckets keyed by JWT identity, allowing
+    # bursts of *_BURST requests refilled at *_PER_MINUTE. The 'memory' store
+    # is per process; use 'sqlite' to share buckets between worker processes
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory')
+    RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB') or os.path.join(BASE_DIR, 'database', 'rate_limits.db')
+    RATE_LIMIT_IMAGE_BURST = int(os.environ.get('RATE_LIMIT_IMAGE_BURST', 30))
+    RATE_LIMIT_IMAGE_PER_MINUTE = float(os.environ.get('RATE_LIMIT_IMAGE_PER_MINUTE', 60))
+    RATE_LIMIT_VIDEO_BURST = int(os.environ.get('RATE_LIMIT_VIDEO_BURST', 5))
+    RATE_LIMIT_VIDEO_PER_MINUTE = float(os.environ.get('RATE_LIMIT_VIDEO_PER_MINUTE', 10))
+    
+    # Inference mode - 'full' scores the whole image/frames, 'faces' scores
+    # every detected face crop in one batch (falls back to 'full' when no
+    # face is found). Clients can override it per request with ?mode=
+    INFERENCE_MODE = os.environ.get('INFERENCE_MODE', 'full')
+    MAX_FACES_PER_BATCH = int(os.environ.get('MAX_FACES_PER_BATCH', 64))
+    
+    # Cascade - a cheap quality/artifact screener scores every input and
+    # only inputs whose fake probability lands between the band thresholds
+    # go on to the full model
+    CASCADE_ENABLED = os.environ.get('CASCADE_ENABLED', 'false').lower() == 'true'
+    CASCADE_BAND_LOW = float(os.environ.get('CASCADE_BAND_LOW', 0.1))
+    CASCADE_BAND_HIGH = float(os.environ.get('CASCADE_BAND_HIGH', 0.9))
+    
+    # Inference server - when set ('unix:/path/to.sock' or 'host:port'),
+    # models run in the standalone inference server (python -m
+    # inference.server) instead of in each web worker. The server batches
+    # up to INFERENCE_MAX_BATCH items, waiting at most INFERENCE_MAX_WAIT_MS
+    INFERENCE_SERVER_ADDRESS = os.environ.get('INFERENCE_SERVER_ADDRESS', '')
+    INFERENCE_SERVER_TIMEOUT = float(os.environ.get('INFERENCE_SERVER_TIMEOUT', 30))
+    INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', 64))
+    INFERENCE_MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5))
+    
+    # Model path (used when no registry version has been activated)
+    MODEL_PATH = os.path.join(os.path.dirname(BASE_DIR), 'trained_models', 'deepfake_detector.h5')
+    
+    # Model registry - versioned artifacts, switched without restarting workers
+    MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR') or os.path.join(os.path.dirname(BASE_DIR), 'trained_models', 'registry')
+    MODEL_REGISTRY_POLL_SECONDS = float(os.environ.get('MODEL_REGISTRY_POLL_SECONDS', 5))
+    
+    # Profiling - admins can profile single requests with X-Profile: sample|cprofile
+    PROFILE_FOLDER = os.path.join(BASE_DIR, 'profiles')
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 50))
+    PROFILER_SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+    PROFILER_CONTINUOUS_ENABLED = os.environ.get('PROFILER_CONTINUOUS_ENABLED', 'false').lower() == 'true'
+    PROFILER_CONTINUOUS_INTERVAL = float(os.environ.get('PROFILER_CONTINUOUS_INTERVAL', 0.1))
\ No newline at end of file
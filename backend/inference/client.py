@@ -0,0 +1,178 @@
+import itertools
+import socket
+import threading
+
+import numpy as np
+
+from inference.protocol import (
+    PREDICT_BATCH, PREDICT_VIDEO, GET_VERSION, RESULT, ERROR,
+    parse_address, send_message, recv_message, encode_array_request, decode_result
+)
+from models.cnn_model import DeepfakeDetector, summarize_frame_results
+
+
+class InferenceError(Exception):
+    pass
+
+
+class InferenceClient:
+    """
+    Client for the standalone inference server. Drop-in for ModelRegistry
+    in the web tier: current() returns a detector whose calls go to the
+    server. Each thread keeps its own connection and reconnects once if the
+    server was restarted.
+    """
+
+    def __init__(self, address, timeout=30.0):
+        self.address = address
+        self.timeout = timeout
+        self._family, self._connect_address = parse_address(address)
+        self._local = threading.local()
+        self._request_ids = itertools.count(1)
+
+    def _socket(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(self._family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self._connect_address)
+            except OSError:
+                sock.close()
+                raise
+            if self._family != socket.AF_UNIX:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def request(self, message_type, *parts):
+        """
+        Send one request and wait for its response
+        Returns: Response body
+        """
+        request_id = next(self._request_ids) & 0xFFFFFFFF
+        for attempt in range(2):
+            try:
+                sock = self._socket()
+                send_message(sock, message_type, request_id, *parts)
+                response_type, response_id, body = recv_message(sock)
+                break
+            except (ConnectionError, BrokenPipeError, FileNotFoundError, ConnectionRefusedError) as e:
+                self._close()
+                if attempt:
+                    raise InferenceError(f"Inference server unavailable at {self.address}: {str(e)}")
+            except OSError:
+                # Timeouts leave the connection out of sync; start over
+                self._close()
+                raise
+
+        if response_id != request_id:
+            self._close()
+            raise InferenceError("Inference server response out of order")
+        if response_type == ERROR:
+            raise InferenceError(bytes(body).decode(errors='replace'))
+        if response_type != RESULT:
+            raise InferenceError(f"Unexpected response type {response_type}")
+        return body
+
+    def current(self, refresh=False):
+        """
+        Pin a request to the server's active model version
+        refresh: ask the server to re-read the active pointer first
+        Returns: (version, RemoteDetector)
+        """
+        version, _ = decode_result(self.request(GET_VERSION, b'\x01' if refresh else b''))
+        return version, RemoteDetector(self, version)
+
+    def get(self, version):
+        """
+        Pin a request to a specific model version, which the server loads
+        if it isn't loaded yet
+        Returns: (version, RemoteDetector)
+        Raises: LookupError when the version is no longer registered
+        """
+        loaded, _ = decode_result(self.request(GET_VERSION, b'\x00' + version.encode()))
+        if loaded != version:
+            raise LookupError(f"Model version {version} is no longer available")
+        return version, RemoteDetector(self, version, exact=True)
+
+
+class RemoteDetector(DeepfakeDetector):
+    """
+    DeepfakeDetector whose inference runs in the inference server. Inputs
+    are sent as uint8 and normalized on the server. Per-item calls
+    (images, frames, faces) go through predict_batch so the server can
+    batch them with other workers' requests.
+    """
+
+    def __init__(self, client, version, exact=False):
+        """
+        exact: fail instead of accepting results from another version when
+               the server no longer has this one loaded
+        """
+        super().__init__(model_path=None, version=version)
+        self.client = client
+        self.exact = exact
+        self.is_loaded = True
+
+    def load_model(self):
+        return True
+
+    def _call(self, message_type, batch):
+        version, verdicts = decode_result(
+            self.client.request(message_type, *encode_array_request(self.version, np.asarray(batch)))
+        )
+        if self.exact and version != self.version:
+            raise InferenceError(f"Model version {self.version} is no longer loaded on the inference server")
+        return verdicts
+
+    def predict_batch(self, batch):
+        """
+        Predict every item of a batch
+        Returns: List of (prediction, confidence) per item
+        """
+        try:
+            return self._call(PREDICT_BATCH, batch) if len(batch) else []
+        except Exception as e:
+            raise Exception(f"Error predicting batch: {str(e)}")
+
+    def predict_image(self, image_array):
+        """
+        Returns: (prediction, confidence)
+        """
+        try:
+            return self._call(PREDICT_BATCH, image_array)[0]
+        except Exception as e:
+            raise Exception(f"Error predicting image: {str(e)}")
+
+    def predict_video(self, frames_array):
+        """
+        Returns: (prediction, confidence)
+        """
+        try:
+            return self._call(PREDICT_VIDEO, frames_array)[0]
+        except Exception as e:
+            raise Exception(f"Error predicting video: {str(e)}")
+
+    def analyze_frames(self, frames_array, frame_numbers=None):
+        """
+        Score every frame in one batched request
+        Returns: Dictionary in the analyze_frames format
+        """
+        try:
+            frame_results = []
+            for i, (prediction, confidence) in enumerate(self.predict_batch(frames_array)):
+                frame_results.append({
+                    'frame_number': int(frame_numbers[i] if frame_numbers is not None else i),
+                    'prediction': prediction,
+                    'confidence': float(confidence)
+                })
+            return summarize_frame_results(frame_results)
+        except Exception as e:
+            raise Exception(f"Error analyzing frames: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,138 @@
+import socket
+import struct
+
+import numpy as np
+
+# Every message is a fixed header followed by body_length bytes:
+#   body_length  uint32
+#   message type uint8
+#   request id   uint32   (echoed back in the response)
+HEADER = struct.Struct('!IBI')
+
+# Request types
+PREDICT_BATCH = 1    # per-item verdicts; batched across clients
+PREDICT_VIDEO = 2    # one verdict for a whole frame sequence
+GET_VERSION = 3      # active model version to pin a request to, or load a given one
+
+# Response types
+RESULT = 16
+ERROR = 17
+
+MAX_BODY = 1 << 30
+
+DTYPES = {0: np.dtype(np.uint8), 1: np.dtype(np.float32)}
+DTYPE_CODES = {dtype: code for code, dtype in DTYPES.items()}
+
+LABELS = ('real', 'fake')
+# One (label, confidence) pair per item
+VERDICT = np.dtype([('label', 'u1'), ('confidence', '>f4')])
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def parse_address(address):
+    """
+    Parse 'unix:/path/to.sock' or 'host:port'
+    Returns: (socket family, address for bind/connect)
+    """
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid inference server address: {address}")
+    return socket.AF_INET, (host, int(port))
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Connection closed")
+        received += count
+    return buffer
+
+
+def send_message(sock, message_type, request_id, *parts):
+    """Send one message whose body is the concatenation of parts"""
+    length = sum(len(part) for part in parts)
+    sock.sendall(HEADER.pack(length, message_type, request_id))
+    for part in parts:
+        sock.sendall(part)
+
+
+def recv_message(sock):
+    """
+    Receive one message
+    Returns: (message type, request id, body bytearray)
+    """
+    length, message_type, request_id = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if length > MAX_BODY:
+        raise ProtocolError(f"Message of {length} bytes exceeds the limit")
+    return message_type, request_id, _recv_exact(sock, length)
+
+
+def _pack_version(version):
+    encoded = (version or '').encode()
+    return struct.pack('!B', len(encoded)) + encoded
+
+
+def _unpack_version(body, offset):
+    length = body[offset]
+    return body[offset + 1:offset + 1 + length].decode(), offset + 1 + length
+
+
+def encode_array_request(version, array):
+    """
+    Body of a predict request: pinned version ('' = active), dtype code,
+    ndim, shape and the raw C-order array bytes
+    Returns: List of body parts (the array is sent without copying)
+    """
+    array = np.ascontiguousarray(array)
+    if array.dtype not in DTYPE_CODES:
+        array = array.astype(np.float32)
+    head = _pack_version(version) + struct.pack(
+        f'!BB{array.ndim}I', DTYPE_CODES[array.dtype], array.ndim, *array.shape
+    )
+    return [head, memoryview(array).cast('B')]
+
+
+def decode_array_request(body):
+    """
+    Returns: (version, array viewing the message body)
+    """
+    version, offset = _unpack_version(body, 0)
+    dtype_code, ndim = struct.unpack_from('!BB', body, offset)
+    offset += 2
+    shape = struct.unpack_from(f'!{ndim}I', body, offset)
+    offset += 4 * ndim
+    if dtype_code not in DTYPES:
+        raise ProtocolError(f"Unknown dtype code {dtype_code}")
+    array = np.frombuffer(body, dtype=DTYPES[dtype_code], offset=offset).reshape(shape)
+    return version, array
+
+
+def encode_result(version, verdicts):
+    """
+    Body of a result: model version then one (label, confidence) per item
+    verdicts: list of (prediction, confidence)
+    """
+    packed = np.array(
+        [(LABELS.index(prediction), confidence) for prediction, confidence in verdicts],
+        dtype=VERDICT
+    )
+    return _pack_version(version) + struct.pack('!I', len(packed)) + packed.tobytes()
+
+
+def decode_result(body):
+    """
+    Returns: (version, list of (prediction, confidence))
+    """
+    version, offset = _unpack_version(body, 0)
+    (count,) = struct.unpack_from('!I', body, offset)
+    packed = np.frombuffer(body, dtype=VERDICT, count=count, offset=offset + 4)
+    return version, [(LABELS[label], float(confidence)) for label, confidence in packed]
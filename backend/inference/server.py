@@ -0,0 +1,283 @@
+"""
+Standalone inference server. Owns the model registry and its detectors,
+accepts tensors from web workers over a Unix domain socket or TCP using
+the binary framing in inference.protocol, and batches per-item requests
+from all connected clients into single predict_batch calls.
+
+Usage (from the backend directory):
+    python -m inference.server --address unix:/tmp/deepfake-inference.sock
+    python -m inference.server --address 127.0.0.1:5050 --max-batch 64
+
+Then point the web tier at it with INFERENCE_SERVER_ADDRESS.
+"""
+import argparse
+import os
+import queue
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from config import Config
+from inference.protocol import (
+    PREDICT_BATCH, PREDICT_VIDEO, GET_VERSION, RESULT, ERROR,
+    parse_address, send_message, recv_message, decode_array_request, encode_result
+)
+from models.model_registry import ModelRegistry
+
+
+class _Job:
+    __slots__ = ('connection', 'request_id', 'message_type', 'version', 'array')
+
+    def __init__(self, connection, request_id, message_type, version, array):
+        self.connection = connection
+        self.request_id = request_id
+        self.message_type = message_type
+        self.version = version
+        self.array = array
+
+
+class _Connection:
+    """A client socket; responses from the inference thread share it"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+
+    def send(self, message_type, request_id, *parts):
+        with self.send_lock:
+            try:
+                send_message(self.sock, message_type, request_id, *parts)
+            except OSError:
+                # Client went away; its reader thread cleans up
+                pass
+
+
+class InferenceServer:
+    """
+    One reader thread per connection queues requests; a single inference
+    thread drains the queue. A PREDICT_BATCH request waits up to max_wait
+    seconds for compatible requests (same model version, item shape and
+    dtype) and runs them together, up to max_batch items.
+    """
+
+    def __init__(self, address, registry, max_batch=64, max_wait=0.005, keep_versions=3):
+        """
+        keep_versions: previously active versions kept loaded, so requests
+                       pinned to a version finish on it during a rollout
+        """
+        self.address = address
+        self.registry = registry
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.keep_versions = keep_versions
+
+        self._jobs = queue.Queue()
+        self._detectors = OrderedDict()
+        self._lock = threading.Lock()
+        self._listener = None
+        self._running = False
+
+    def resolve(self, version, refresh=False):
+        """
+        Detector for a pinned version, or the active one if version is
+        empty or no longer loaded
+        Returns: (version, detector)
+        """
+        active = self.registry.current(refresh=refresh)
+        with self._lock:
+            self._detectors[active[0]] = active[1]
+            self._detectors.move_to_end(active[0])
+            while len(self._detectors) > self.keep_versions + 1:
+                self._detectors.popitem(last=False)
+
+            if version and version != active[0] and version in self._detectors:
+                return version, self._detectors[version]
+        return active
+
+    def pin(self, version):
+        """
+        Load a specific version and keep it with the previously active ones
+        Returns: The version, or '' when it is no longer registered
+        """
+        try:
+            version, detector = self.registry.get(version)
+        except LookupError:
+            return ''
+        with self._lock:
+            self._detectors[version] = detector
+            self._detectors.move_to_end(version)
+            while len(self._detectors) > self.keep_versions + 1:
+                self._detectors.popitem(last=False)
+        return version
+
+    def serve_forever(self):
+        family, bind_address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(bind_address):
+            os.remove(bind_address)
+
+        self._listener = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(bind_address)
+        self._listener.listen(128)
+        self._running = True
+
+        threading.Thread(target=self._inference_loop, name='inference', daemon=True).start()
+        version, _ = self.resolve('')
+        print(f"✅ Inference server listening on {self.address} (model {version})")
+
+        try:
+            while self._running:
+                try:
+                    sock, _ = self._listener.accept()
+                except OSError:
+                    break
+                if family != socket.AF_UNIX:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                threading.Thread(target=self._handle_connection, args=(sock,), daemon=True).start()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if not self._running:
+            return
+        self._running = False
+        self._jobs.put(None)
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        family, bind_address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(bind_address):
+            os.remove(bind_address)
+
+    def _handle_connection(self, sock):
+        connection = _Connection(sock)
+        try:
+            while True:
+                message_type, request_id, body = recv_message(sock)
+                try:
+                    if message_type == GET_VERSION:
+                        # Body: refresh flag, then optionally a version to pin
+                        if len(body) > 1:
+                            version = self.pin(bytes(body[1:]).decode())
+                        else:
+                            version, _ = self.resolve('', refresh=bool(body and body[0]))
+                        connection.send(RESULT, request_id, encode_result(version, []))
+                    elif message_type in (PREDICT_BATCH, PREDICT_VIDEO):
+                        version, array = decode_array_request(body)
+                        self._jobs.put(_Job(connection, request_id, message_type, version, array))
+                    else:
+                        connection.send(ERROR, request_id, f"Unknown message type {message_type}".encode())
+                except Exception as e:
+                    connection.send(ERROR, request_id, str(e).encode())
+        except (ConnectionError, OSError):
+            pass
+        except Exception as e:
+            print(f"Error on inference connection: {str(e)}")
+        finally:
+            sock.close()
+
+    def _compatible(self, job, other, resolved):
+        """
+        resolved: pinned version -> served version for the current batch,
+                  so each distinct version is resolved once per batch
+        """
+        if (other.message_type != PREDICT_BATCH
+                or other.array.shape[1:] != job.array.shape[1:]
+                or other.array.dtype != job.array.dtype):
+            return False
+        if other.version not in resolved:
+            resolved[other.version] = self.resolve(other.version)[0]
+        return resolved[other.version] == resolved[job.version]
+
+    def _inference_loop(self):
+        # Requests that didn't fit the previous batch go first next time
+        deferred = deque()
+        while True:
+            job = deferred.popleft() if deferred else self._jobs.get()
+            if job is None:
+                return
+
+            if job.message_type == PREDICT_VIDEO:
+                self._run(job.version, [job], video=True)
+                continue
+
+            version, _ = self.resolve(job.version)
+            resolved = {job.version: version}
+            batch = [job]
+            items = len(job.array)
+
+            for other in list(deferred):
+                if items >= self.max_batch:
+                    break
+                if self._compatible(job, other, resolved) and items + len(other.array) <= self.max_batch:
+                    deferred.remove(other)
+                    batch.append(other)
+                    items += len(other.array)
+
+            deadline = time.monotonic() + self.max_wait
+            while items < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    other = self._jobs.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if other is None:
+                    self._jobs.put(None)
+                    break
+                if self._compatible(job, other, resolved) and items + len(other.array) <= self.max_batch:
+                    batch.append(other)
+                    items += len(other.array)
+                else:
+                    deferred.append(other)
+
+            self._run(version, batch)
+
+    def _run(self, version, jobs, video=False):
+        try:
+            version, detector = self.resolve(version)
+            if video:
+                verdicts = [detector.predict_video(jobs[0].array)]
+                results = [verdicts]
+            else:
+                arrays = [job.array for job in jobs]
+                batch = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+                verdicts = detector.predict_batch(batch)
+                results = []
+                start = 0
+                for array in arrays:
+                    results.append(verdicts[start:start + len(array)])
+                    start += len(array)
+
+            for job, job_verdicts in zip(jobs, results):
+                job.connection.send(RESULT, job.request_id, encode_result(version, job_verdicts))
+
+        except Exception as e:
+            for job in jobs:
+                job.connection.send(ERROR, job.request_id, str(e).encode())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the standalone inference server')
+    parser.add_argument('--address', default=Config.INFERENCE_SERVER_ADDRESS or 'unix:/tmp/deepfake-inference.sock',
+                        help="'unix:/path/to.sock' or 'host:port'")
+    parser.add_argument('--max-batch', type=int, default=Config.INFERENCE_MAX_BATCH)
+    parser.add_argument('--max-wait-ms', type=float, default=Config.INFERENCE_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(
+        Config.MODEL_REGISTRY_DIR,
+        fallback_model_path=Config.MODEL_PATH,
+        poll_interval=Config.MODEL_REGISTRY_POLL_SECONDS
+    )
+    server = InferenceServer(args.address, registry, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
\ No newline at end of file
@@ -0,0 +1,43 @@
+import argparse
+import json
+from config import Config
+from models.model_registry import ModelRegistry
+
+registry = ModelRegistry(Config.MODEL_REGISTRY_DIR, fallback_model_path=Config.MODEL_PATH)
+
+parser = argparse.ArgumentParser(description='Manage versioned deepfake detection models')
+subparsers = parser.add_subparsers(dest='command', required=True)
+
+subparsers.add_parser('list', help='List registered versions')
+
+register_parser = subparsers.add_parser('register', help='Register a model artifact')
+register_parser.add_argument('version')
+register_parser.add_argument('artifact')
+register_parser.add_argument('--description', default='')
+register_parser.add_argument('--activate', action='store_true')
+
+activate_parser = subparsers.add_parser('activate', help='Activate a registered version')
+activate_parser.add_argument('version')
+
+args = parser.parse_args()
+
+if args.command == 'list':
+    active = registry.active_version()
+    print(f"Active version: {active}")
+    for metadata in registry.list_versions():
+        marker = '*' if metadata['version'] == active else ' '
+        print(f"{marker} {metadata['version']}  {metadata['registered_at']}  {metadata.get('description', '')}")
+
+elif args.command == 'register':
+    metadata = registry.register(
+        args.version,
+        args.artifact,
+        metadata={'description': args.description},
+        activate=args.activate
+    )
+    print(f"✅ Registered {args.version}")
+    print(json.dumps(metadata, indent=2))
+
+elif args.command == 'activate':
+    registry.activate(args.version)
+    print(f"✅ {args.version} is now the active model")
\ No newline at end of file
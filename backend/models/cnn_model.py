@@ -1,5 +1,25 @@
 import numpy as np
 import os
+from utils.buffers import buffer_pool, normalize_uint8
+
+
+def summarize_frame_results(frame_results):
+    """
+    Overall statistics for a list of per-frame results
+    Returns: Dictionary in the analyze_frames format
+    """
+    fake_count = int(sum(1 for r in frame_results if r['prediction'] == 'fake'))
+    avg_confidence = float(np.mean([r['confidence'] for r in frame_results])) if frame_results else 0.0
+    
+    return {
+        'frame_results': frame_results,
+        'total_frames': int(len(frame_results)),
+        'fake_frames': fake_count,
+        'real_frames': int(len(frame_results) - fake_count),
+        'avg_confidence': avg_confidence,
+        'overall_prediction': "fake" if fake_count > len(frame_results) / 2 else "real"
+    }
+
 
 class DeepfakeDetector:
     """
@@ -7,8 +27,9 @@ class DeepfakeDetector:
     This is a simplified version. You'll train a real model later.
     """
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, version=None):
         self.model_path = model_path
+        self.version = version
         self.model = None
         self.is_loaded = False
     
@@ -30,12 +51,29 @@ class DeepfakeDetector:
             print(f"Error loading model: {str(e)}")
             return False
     
+    def prepare_input(self, batch):
+        """
+        Model boundary: turn a uint8 RGB batch into the model's float32
+        [0, 1] input. Preprocessing keeps frames as uint8 up to here so the
+        float copy is made exactly once, into a reused per-thread buffer.
+        A model that rescales inside its own graph (e.g. a Keras Rescaling
+        layer) can take the uint8 batch directly.
+        """
+        batch = np.asarray(batch)
+        if batch.dtype != np.uint8:
+            return batch
+        
+        out = buffer_pool.get('model_input', batch.shape[0], batch.shape[1:], np.float32)
+        return normalize_uint8(batch, out=out)
+    
     def predict_image(self, image_array):
         """
         Predict if image is fake or real
         Returns: (prediction, confidence)
         """
         try:
+            image_array = self.prepare_input(image_array)
+            
             # TODO: Use actual model prediction
             # prediction = self.model.predict(image_array)
             
@@ -56,6 +94,8 @@ class DeepfakeDetector:
         Returns: (prediction, confidence)
         """
         try:
+            frames_array = self.prepare_input(frames_array)
+            
             # TODO: Use actual model prediction on frames
             # predictions = []
             # for frame in frames_array:
@@ -73,11 +113,14 @@ class DeepfakeDetector:
         except Exception as e:
             raise Exception(f"Error predicting video: {str(e)}")
     
-    def analyze_frames(self, frames_array):
+    def analyze_frames(self, frames_array, frame_numbers=None):
         """
         Analyze individual frames and return detailed results
+        frame_numbers: optional source frame number of each frame, reported
+                       instead of the position in the batch
         """
         try:
+            frames_array = self.prepare_input(frames_array)
             frame_results = []
             
             for i, frame in enumerate(frames_array):
@@ -86,23 +129,84 @@ class DeepfakeDetector:
                 is_fake = bool(np.random.choice([True, False]))
                 
                 frame_results.append({
-                    'frame_number': int(i),
+                    'frame_number': int(frame_numbers[i] if frame_numbers is not None else i),
                     'prediction': "fake" if is_fake else "real",
                     'confidence': float(confidence)
                 })
             
             # Calculate overall statistics
-            fake_count = int(sum(1 for r in frame_results if r['prediction'] == 'fake'))
-            avg_confidence = float(np.mean([r['confidence'] for r in frame_results]))
+            return summarize_frame_results(frame_results)
+            
+        except Exception as e:
+            raise Exception(f"Error analyzing frames: {str(e)}")
+    
+    def predict_batch(self, batch):
+        """
+        Predict every item of a batch in a single forward pass
+        Returns: List of (prediction, confidence) per item
+        """
+        try:
+            batch = self.prepare_input(batch)
+            
+            # TODO: Use actual model prediction
+            # scores = self.model.predict(batch)
+            
+            # Placeholder: Random prediction per item
+            results = []
+            for _ in range(len(batch)):
+                confidence = float(np.random.uniform(0.5, 0.99))
+                is_fake = bool(np.random.choice([True, False]))
+                results.append(("fake" if is_fake else "real", confidence))
+            
+            return results
+            
+        except Exception as e:
+            raise Exception(f"Error predicting batch: {str(e)}")
+    
+    def analyze_faces(self, face_batch, face_index, aggregate='any'):
+        """
+        Score a batch of face crops in one call and aggregate the verdicts
+        face_index: per-face metadata (e.g. box, frame_number), same order
+        aggregate: 'any' - fake if any face is fake (images, where a single
+                   swapped face makes the image fake); 'majority' - fake if
+                   most faces are (videos, where each face repeats per frame)
+        Returns: Dictionary with per-face results and the overall verdict
+        """
+        try:
+            predictions = self.predict_batch(face_batch) if len(face_batch) else []
+            
+            face_results = []
+            for meta, (prediction, confidence) in zip(face_index, predictions):
+                face_results.append(dict(meta, prediction=prediction, confidence=float(confidence)))
+            
+            fake_results = [r for r in face_results if r['prediction'] == 'fake']
+            real_results = [r for r in face_results if r['prediction'] == 'real']
+            
+            if aggregate == 'majority':
+                is_fake = len(fake_results) > len(face_results) / 2
+            else:
+                is_fake = len(fake_results) > 0
+            
+            # Confidence of the verdict: for 'any', the strongest fake face
+            # or the least certain real one; for 'majority', the mean of
+            # the faces that agree with the verdict
+            agreeing = fake_results if is_fake else real_results
+            confidences = [r['confidence'] for r in agreeing]
+            if not confidences:
+                confidence = 0.0
+            elif aggregate == 'majority':
+                confidence = float(np.mean(confidences))
+            else:
+                confidence = float(max(confidences) if is_fake else min(confidences))
             
             return {
-                'frame_results': frame_results,
-                'total_frames': int(len(frame_results)),
-                'fake_frames': fake_count,
-                'real_frames': int(len(frame_results) - fake_count),
-                'avg_confidence': avg_confidence,
-                'overall_prediction': "fake" if fake_count > len(frame_results) / 2 else "real"
+                'face_results': face_results,
+                'total_faces': int(len(face_results)),
+                'fake_faces': int(len(fake_results)),
+                'real_faces': int(len(real_results)),
+                'overall_prediction': "fake" if is_fake else "real",
+                'confidence': confidence
             }
             
         except Exception as e:
-            raise Exception(f"Error analyzing frames: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error analyzing faces: {str(e)}")
\ No newline at end of file
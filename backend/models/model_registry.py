@@ -0,0 +1,268 @@
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from models.cnn_model import DeepfakeDetector
+
+ACTIVE_FILE = 'ACTIVE'
+METADATA_FILE = 'metadata.json'
+DEFAULT_VERSION = 'default'
+
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts with an atomically swapped
+    active pointer.
+
+    Layout:
+        <registry_dir>/<version>/<artifact>        (e.g. model.h5)
+        <registry_dir>/<version>/metadata.json
+        <registry_dir>/ACTIVE                      (name of the active version)
+
+    Every worker polls the ACTIVE pointer, so activating a version rolls it
+    out without a restart. Requests hold on to the detector they started
+    with, so in-flight work finishes on the old model while new requests
+    pick up the new one.
+    """
+
+    def __init__(self, registry_dir, fallback_model_path=None, poll_interval=5.0, keep_pinned=2):
+        """
+        keep_pinned: inactive versions kept loaded for get()
+        """
+        self.registry_dir = registry_dir
+        self.fallback_model_path = fallback_model_path
+        self.poll_interval = poll_interval
+        self.keep_pinned = keep_pinned
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._active = (None, None)
+        self._pinned = OrderedDict()
+        self._last_poll = 0.0
+
+    def _version_dir(self, version):
+        return os.path.join(self.registry_dir, version)
+
+    def _pointer_path(self):
+        return os.path.join(self.registry_dir, ACTIVE_FILE)
+
+    def list_versions(self):
+        """
+        List registered versions
+        Returns: List of metadata dictionaries, newest first
+        """
+        if not os.path.isdir(self.registry_dir):
+            return []
+
+        versions = []
+        for name in os.listdir(self.registry_dir):
+            if os.path.isfile(os.path.join(self._version_dir(name), METADATA_FILE)):
+                versions.append(self.get_metadata(name))
+
+        versions.sort(key=lambda m: m.get('registered_at', ''), reverse=True)
+        return versions
+
+    def get_metadata(self, version):
+        """Load metadata for a registered version"""
+        metadata_path = os.path.join(self._version_dir(version), METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            raise ValueError(f"Unknown model version: {version}")
+
+        with open(metadata_path) as f:
+            return json.load(f)
+
+    def register(self, version, artifact_path, metadata=None, activate=False):
+        """
+        Copy a model artifact into the registry as a new version
+        Returns: Metadata dictionary of the new version
+        """
+        if not version or os.sep in version or version.startswith('.') or version == ACTIVE_FILE:
+            raise ValueError(f"Invalid model version name: {version}")
+        # 'default' always means the fallback model path
+        if version == DEFAULT_VERSION:
+            raise ValueError(f"Model version name is reserved: {version}")
+
+        version_dir = self._version_dir(version)
+        if os.path.exists(version_dir):
+            raise ValueError(f"Model version already exists: {version}")
+
+        # Stage into a temporary directory and rename so a half-copied
+        # version is never visible to other workers
+        staging_dir = f"{version_dir}.tmp-{os.getpid()}"
+        os.makedirs(staging_dir)
+        try:
+            artifact_name = os.path.basename(artifact_path)
+            shutil.copy2(artifact_path, os.path.join(staging_dir, artifact_name))
+
+            record = dict(metadata or {})
+            record.update({
+                'version': version,
+                'artifact': artifact_name,
+                'registered_at': datetime.utcnow().isoformat()
+            })
+            with open(os.path.join(staging_dir, METADATA_FILE), 'w') as f:
+                json.dump(record, f, indent=2)
+
+            os.rename(staging_dir, version_dir)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+
+        return record
+
+    def activate(self, version, load=True):
+        """
+        Atomically point the registry at a registered version. The artifact
+        is loaded first, so a version that fails to load never becomes
+        active.
+        load: load the version here and switch this worker to it; pass
+              False when another process (the inference server) serves the
+              model, and rollback() if it can't load it
+        Returns: The previously active version, or None if none was set
+        """
+        self.get_metadata(version)
+        detector = self._load(version) if load else None
+
+        try:
+            with open(self._pointer_path()) as f:
+                previous = f.read().strip() or None
+        except FileNotFoundError:
+            previous = None
+        self._write_pointer(version)
+
+        if detector is None:
+            # Make this worker switch on its next current() call
+            self.refresh()
+        else:
+            with self._lock:
+                self._active = (version, detector)
+                self._last_poll = time.monotonic()
+            print(f"Active model version: {version}")
+        return previous
+
+    def rollback(self, previous):
+        """
+        Put back the pointer activate() replaced
+        previous: version returned by activate(), None to clear the pointer
+        """
+        if previous is None:
+            try:
+                os.remove(self._pointer_path())
+            except FileNotFoundError:
+                pass
+        else:
+            self._write_pointer(previous)
+        self.refresh()
+
+    def _write_pointer(self, version):
+        pointer_path = self._pointer_path()
+        tmp_path = f"{pointer_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, pointer_path)
+
+    def refresh(self):
+        """Re-read the active pointer on the next current() call"""
+        with self._lock:
+            self._last_poll = 0.0
+
+    def active_version(self):
+        """
+        Read the active version from the pointer file
+        Returns: Version name, or the default version if nothing is active
+        """
+        try:
+            with open(self._pointer_path()) as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except FileNotFoundError:
+            pass
+        return DEFAULT_VERSION
+
+    def _load(self, version):
+        if version == DEFAULT_VERSION:
+            model_path = self.fallback_model_path
+        else:
+            metadata = self.get_metadata(version)
+            model_path = os.path.join(self._version_dir(version), metadata['artifact'])
+
+        detector = DeepfakeDetector(model_path, version=version)
+        if not detector.load_model():
+            raise RuntimeError(f"Could not load model version {version}")
+        return detector
+
+    def current(self, refresh=False):
+        """
+        Get the detector for the active version, loading it on a switch.
+        Callers should fetch this once per request and use the returned
+        detector for the whole request.
+        refresh: re-read the active pointer now instead of on the next poll
+        Returns: (version, detector)
+        """
+        if refresh:
+            self.refresh()
+
+        with self._lock:
+            active = self._active
+            now = time.monotonic()
+            if active[1] is not None and now - self._last_poll < self.poll_interval:
+                return active
+            self._last_poll = now
+
+        version = self.active_version()
+        if version == active[0] and active[1] is not None:
+            return active
+
+        # Load outside the request lock so other requests keep being
+        # served by the previous model while the new one loads
+        with self._load_lock:
+            active = self._active
+            if version != active[0] or active[1] is None:
+                try:
+                    detector = self._load(version)
+                except Exception as e:
+                    if active[1] is None:
+                        raise
+                    print(f"Keeping model {active[0]}, failed to switch to {version}: {str(e)}")
+                    return active
+
+                active = (version, detector)
+                with self._lock:
+                    self._active = active
+                print(f"Active model version: {version}")
+
+        return active
+
+    def get(self, version):
+        """
+        Get the detector for a specific version, e.g. to compute results of
+        an older analysis on the model that produced it
+        Returns: (version, detector)
+        Raises: LookupError when the version is no longer registered
+        """
+        active = self.current()
+        if version == active[0]:
+            return active
+
+        with self._load_lock:
+            detector = self._pinned.get(version)
+            if detector is None:
+                try:
+                    detector = self._load(version)
+                except ValueError:
+                    raise LookupError(f"Model version {version} is no longer available")
+                self._pinned[version] = detector
+                while len(self._pinned) > self.keep_pinned:
+                    self._pinned.popitem(last=False)
+            self._pinned.move_to_end(version)
+        return version, detector
@@ -1,6 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import json
+import numpy as np
 from flask_bcrypt import Bcrypt
+from sqlalchemy import inspect, text, update
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
@@ -45,6 +48,12 @@ class SearchHistory(db.Model):
     confidence_score = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     file_path = db.Column(db.String(500))
+    model_version = db.Column(db.String(100))
+    
+    # Per-frame results of video analyses
+    frames = db.relationship('FrameResults', uselist=False, lazy=True, cascade='all, delete-orphan')
+    # Secondary analyses computed on demand, by section
+    details = db.relationship('AnalysisDetail', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -55,5 +64,140 @@ class SearchHistory(db.Model):
             'file_type': self.file_type,
             'detection_result': self.detection_result,
             'confidence_score': round(self.confidence_score, 2),
+            'model_version': self.model_version,
             'timestamp': self.timestamp.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+class FrameResults(db.Model):
+    """
+    Per-frame results of one video analysis, packed column-wise: frame
+    numbers as uint32, confidences as float16 and predictions as a bitset
+    (1 = fake), about 6 bytes per frame
+    """
+    __tablename__ = 'frame_results'
+    
+    analysis_id = db.Column(db.Integer, db.ForeignKey('search_history.id'), primary_key=True)
+    frame_count = db.Column(db.Integer, nullable=False)
+    frame_numbers = db.Column(db.LargeBinary, nullable=False)
+    confidences = db.Column(db.LargeBinary, nullable=False)
+    predictions = db.Column(db.LargeBinary, nullable=False)
+    
+    @staticmethod
+    def encode(frame_results):
+        """
+        Pack a list of analyze_frames results
+        Returns: Dictionary of column values (without analysis_id)
+        """
+        return {
+            'frame_count': len(frame_results),
+            'frame_numbers': np.array([r['frame_number'] for r in frame_results], dtype='<u4').tobytes(),
+            'confidences': np.array([r['confidence'] for r in frame_results], dtype='<f2').tobytes(),
+            'predictions': np.packbits([r['prediction'] == 'fake' for r in frame_results]).tobytes()
+        }
+    
+    def to_frame_results(self):
+        """
+        Unpack into the analyze_frames per-frame format
+        Returns: List of {'frame_number', 'prediction', 'confidence'}
+        """
+        frame_numbers = np.frombuffer(self.frame_numbers, dtype='<u4')
+        confidences = np.frombuffer(self.confidences, dtype='<f2').astype(np.float32)
+        fake = np.unpackbits(np.frombuffer(self.predictions, dtype=np.uint8), count=self.frame_count)
+        
+        return [
+            {
+                'frame_number': int(frame_number),
+                'prediction': 'fake' if is_fake else 'real',
+                'confidence': round(float(confidence), 4)
+            }
+            for frame_number, confidence, is_fake in zip(frame_numbers, confidences, fake)
+        ]
+
+
+class AnalysisDetail(db.Model):
+    """
+    Memoized secondary analysis of one search history entry (e.g. its
+    quality metrics), stored as JSON once computed
+    """
+    __tablename__ = 'analysis_details'
+    
+    analysis_id = db.Column(db.Integer, db.ForeignKey('search_history.id'), primary_key=True)
+    section = db.Column(db.String(20), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_data(self):
+        return json.loads(self.data)
+
+
+class ChangeCounter(db.Model):
+    """
+    Version of a slice of data ('user:<id>' for one user's history,
+    'users' for the user records themselves, 'global' for everything),
+    bumped on every write to it. Conditional GETs and the user cache
+    compare against it instead of querying the data.
+    """
+    __tablename__ = 'change_counters'
+    
+    scope = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    GLOBAL = 'global'
+    USERS = 'users'
+    
+    @staticmethod
+    def user_scope(user_id):
+        return f"user:{user_id}"
+    
+    @staticmethod
+    def bump(executor, scopes):
+        """
+        Mark the data of each scope as changed, as part of the caller's
+        transaction
+        executor: db.session or a Connection inside a transaction
+        """
+        table = ChangeCounter.__table__
+        now = datetime.utcnow()
+        for scope in sorted(set(scopes)):
+            result = executor.execute(
+                update(table)
+                .where(table.c.scope == scope)
+                .values(version=table.c.version + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                executor.execute(table.insert().values(scope=scope, version=1, updated_at=now))
+
+
+class IdSequence(db.Model):
+    """
+    Next unallocated id of a table whose ids are handed out in blocks
+    before the rows are written (see utils.history_writer)
+    """
+    __tablename__ = 'id_sequences'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    next_id = db.Column(db.Integer, nullable=False)
+
+
+# Columns added after the initial release: (table, column, DDL type).
+# db.create_all() creates missing tables but never alters existing ones.
+SCHEMA_ADDITIONS = [
+    ('search_history', 'model_version', 'VARCHAR(100)'),
+]
+
+
+def upgrade_schema():
+    """
+    Add any missing columns from SCHEMA_ADDITIONS to existing tables
+    """
+    inspector = inspect(db.engine)
+    
+    for table, column, ddl in SCHEMA_ADDITIONS:
+        existing = {c['name'] for c in inspector.get_columns(table)}
+        if column not in existing:
+            db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+            print(f"Added column {table}.{column}")
+    
+    db.session.commit()
\ No newline at end of file
@@ -1,21 +1,29 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from models.user import db, User, SearchHistory
+from flask import Blueprint, request, jsonify, current_app, send_from_directory, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.user import db, User, SearchHistory, FrameResults, AnalysisDetail, ChangeCounter
+from routes.detection import model_registry, model_source, thumbnail_cache
+from utils.history_writer import history_writer
+from utils.response_encoding import negotiate_response, respond
+from utils.conditional import conditional
+from utils.user_cache import user_cache
+from utils import profiler
 from functools import wraps
 
 admin_bp = Blueprint('admin', __name__)
+admin_bp.after_request(negotiate_response)
 
 
 def admin_required():
     """
-    Decorator to require admin role
+    Decorator to require admin role. Checks the user's current role from
+    the user cache rather than the token's role claim, so demoted admins
+    lose access before their token expires.
     """
     def wrapper(fn):
         @wraps(fn)
         @jwt_required()
         def decorator(*args, **kwargs):
-            claims = get_jwt()
-            if claims.get('role') != 'admin':
+            if user_cache.role(get_jwt_identity()) != 'admin':
                 return jsonify({'error': 'Admin access required'}), 403
             return fn(*args, **kwargs)
         return decorator
@@ -24,6 +32,7 @@ def admin_required():
 
 @admin_bp.route('/users', methods=['GET'])
 @admin_required()
+@conditional(lambda: [ChangeCounter.GLOBAL])
 def get_all_users():
     """
     Get all users (admin only)
@@ -41,14 +50,14 @@ def get_all_users():
         
         users = [user.to_dict() for user in pagination.items]
         
-        return jsonify({
+        return respond({
             'success': True,
             'users': users,
             'total': pagination.total,
             'page': pagination.page,
             'per_page': pagination.per_page,
             'total_pages': pagination.pages
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch users: {str(e)}'}), 500
@@ -56,6 +65,7 @@ def get_all_users():
 
 @admin_bp.route('/users/<int:user_id>', methods=['GET'])
 @admin_required()
+@conditional(lambda: [ChangeCounter.GLOBAL])
 def get_user_details(user_id):
     """
     Get detailed information about a specific user
@@ -74,12 +84,12 @@ def get_user_details(user_id):
         
         analysis_count = SearchHistory.query.filter_by(user_id=user_id).count()
         
-        return jsonify({
+        return respond({
             'success': True,
             'user': user.to_dict(),
             'recent_analyses': [a.to_dict() for a in analyses],
             'total_analyses': analysis_count
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch user details: {str(e)}'}), 500
@@ -93,6 +103,7 @@ def delete_user(user_id):
     """
     try:
         current_user_id = get_jwt_identity()
+        history_writer.flush()
         
         # Prevent admin from deleting themselves
         if user_id == current_user_id:
@@ -103,17 +114,24 @@ def delete_user(user_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Delete user's search history
+        # Delete user's search history with its per-frame results and details
+        user_analyses = db.session.query(SearchHistory.id).filter_by(user_id=user_id)
+        for (analysis_id,) in user_analyses.all():
+            thumbnail_cache.evict(analysis_id)
+        for model in (FrameResults, AnalysisDetail):
+            model.query.filter(model.analysis_id.in_(user_analyses)).delete(synchronize_session=False)
         SearchHistory.query.filter_by(user_id=user_id).delete()
         
         # Delete user
         db.session.delete(user)
+        ChangeCounter.bump(db.session, [ChangeCounter.user_scope(user_id), ChangeCounter.USERS, ChangeCounter.GLOBAL])
         db.session.commit()
+        user_cache.invalidate(user_id)
         
-        return jsonify({
+        return respond({
             'success': True,
             'message': 'User deleted successfully'
-        }), 200
+        }, 200)
         
     except Exception as e:
         db.session.rollback()
@@ -122,6 +140,7 @@ def delete_user(user_id):
 
 @admin_bp.route('/all-history', methods=['GET'])
 @admin_required()
+@conditional(lambda: [ChangeCounter.GLOBAL])
 def get_all_history():
     """
     Get all users' search history (admin only)
@@ -139,14 +158,14 @@ def get_all_history():
         
         history_items = [item.to_dict() for item in pagination.items]
         
-        return jsonify({
+        return respond({
             'success': True,
             'history': history_items,
             'total': pagination.total,
             'page': pagination.page,
             'per_page': pagination.per_page,
             'total_pages': pagination.pages
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch history: {str(e)}'}), 500
@@ -154,6 +173,7 @@ def get_all_history():
 
 @admin_bp.route('/stats', methods=['GET'])
 @admin_required()
+@conditional(lambda: [ChangeCounter.GLOBAL])
 def get_system_stats():
     """
     Get overall system statistics (admin only)
@@ -174,7 +194,7 @@ def get_system_stats():
             .limit(5)\
             .all()
         
-        return jsonify({
+        return respond({
             'success': True,
             'stats': {
                 'total_users': total_users,
@@ -185,7 +205,7 @@ def get_system_stats():
                 'videos_analyzed': video_count
             },
             'recent_activity': [a.to_dict() for a in recent_analyses]
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch stats: {str(e)}'}), 500
@@ -216,14 +236,123 @@ def update_user_role(user_id):
             return jsonify({'error': 'User not found'}), 404
         
         user.role = new_role
+        ChangeCounter.bump(db.session, [ChangeCounter.USERS, ChangeCounter.GLOBAL])
         db.session.commit()
+        user_cache.invalidate(user_id)
         
-        return jsonify({
+        return respond({
             'success': True,
             'message': f'User role updated to {new_role}',
             'user': user.to_dict()
-        }), 200
+        }, 200)
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': f'Failed to update role: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Failed to update role: {str(e)}'}), 500
+
+
+@admin_bp.route('/models', methods=['GET'])
+@admin_required()
+def list_models():
+    """
+    List registered model versions (admin only)
+    """
+    try:
+        serving_version, _ = model_source.current()
+        
+        return respond({
+            'success': True,
+            'active_version': model_registry.active_version(),
+            'serving_version': serving_version,
+            'models': model_registry.list_versions()
+        }, 200)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch models: {str(e)}'}), 500
+
+
+@admin_bp.route('/models/<version>/activate', methods=['PUT'])
+@admin_required()
+def activate_model(version):
+    """
+    Activate a registered model version (admin only)
+    """
+    try:
+        # In-process, activate() loads the artifact before switching the
+        # pointer. The inference server loads it on refresh, and the
+        # pointer is put back if that fails, so workers don't keep retrying
+        # a broken version
+        in_process = model_source is model_registry
+        try:
+            previous = model_registry.activate(version, load=in_process)
+        except RuntimeError as e:
+            serving_version = model_registry.current()[0]
+            return jsonify({'error': f'{str(e)}, still serving {serving_version}'}), 500
+        
+        if not in_process:
+            serving_version, _ = model_source.current(refresh=True)
+            if serving_version != version:
+                model_registry.rollback(previous)
+                return jsonify({'error': f'Model {version} failed to load, still serving {serving_version}'}), 500
+        
+        return respond({
+            'success': True,
+            'message': f'Model version {version} activated',
+            'active_version': version
+        }, 200)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': f'Failed to activate model: {str(e)}'}), 500
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+@admin_required()
+def list_profiles():
+    """
+    List stored request profiles (admin only)
+    """
+    try:
+        return respond({
+            'success': True,
+            'profiles': profiler.list_profiles(current_app.config['PROFILE_FOLDER']),
+            'continuous_sampling': profiler.continuous_sampler is not None
+        }, 200)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch profiles: {str(e)}'}), 500
+
+
+@admin_bp.route('/profiles/continuous', methods=['GET'])
+@admin_required()
+def download_continuous_profile():
+    """
+    Download collapsed stacks from the continuous sampler (admin only)
+    Pass ?reset=1 to start a fresh collection window afterwards.
+    """
+    sampler = profiler.continuous_sampler
+    if sampler is None:
+        return jsonify({'error': 'Continuous sampling is not enabled'}), 404
+    
+    collapsed = sampler.collapsed()
+    if request.args.get('reset', type=int):
+        sampler.reset()
+    
+    return Response(
+        collapsed,
+        mimetype='text/plain',
+        headers={'Content-Disposition': 'attachment; filename=continuous.collapsed'}
+    )
+
+
+@admin_bp.route('/profiles/<path:name>', methods=['GET'])
+@admin_required()
+def download_profile(name):
+    """
+    Download a stored request profile (admin only)
+    """
+    if not name.endswith(profiler.PROFILE_EXTENSIONS):
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    return send_from_directory(current_app.config['PROFILE_FOLDER'], name, as_attachment=True)
\ No newline at end of file
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
-from models.user import db, User
+from models.user import db, User, ChangeCounter
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from utils.user_cache import user_cache
 import re
 
 auth_bp = Blueprint('auth', __name__)
@@ -47,6 +48,7 @@ def signup():
             new_user.role = 'admin'
         
         db.session.add(new_user)
+        ChangeCounter.bump(db.session, [ChangeCounter.USERS, ChangeCounter.GLOBAL])
         db.session.commit()
         
         return jsonify({
@@ -97,14 +99,14 @@ def login():
 def verify_token():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = user_cache.get(current_user_id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
         return jsonify({
             'valid': True,
-            'user': user.to_dict()
+            'user': user
         }), 200
         
     except Exception as e:
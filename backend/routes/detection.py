@@ -1,24 +1,122 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.user import db, User, SearchHistory
-from models.cnn_model import DeepfakeDetector
+from models.user import db, User, SearchHistory, ChangeCounter
+from models.model_registry import ModelRegistry, DEFAULT_VERSION
+from models.cnn_model import summarize_frame_results
+from models.cascade import CascadeDetector, QualityScreener
+from inference.client import InferenceClient
 from utils.image_processor import ImageProcessor
 from utils.video_processor import VideoProcessor
-from utils.file_utils import allowed_file, get_file_type, save_upload_file, delete_file, get_file_size
+from utils.file_utils import allowed_file, get_file_type, save_upload_file, delete_file, get_file_size, \
+    read_upload_bytes, reserve_upload_path, save_bytes_async
+from utils.metrics import time_stage, RESULTS, QUEUE_DEPTH
+from utils.profiler import profiled
+from utils.buffers import buffer_pool
+from utils.frame_cache import FrameCache
+from utils.segment_processor import SegmentProcessor
+from utils.admission import AdmissionPool, Overloaded, admission_required, overloaded_response
+from utils.rate_limit import create_rate_limiter, rate_limited
+from utils.history_writer import history_writer
+from utils.analysis_details import DetailAnalyzer, parse_include
+from utils.response_encoding import negotiate_response, respond
+from utils.conditional import conditional
+from utils.thumbnails import ThumbnailCache
+from utils.media_urls import MEDIA_KINDS, sign_media_url, verify_media_token
+import json
 import os
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from config import Config
 
 detection_bp = Blueprint('detection', __name__)
+detection_bp.after_request(negotiate_response)
 
 # Initialize processors and model
-image_processor = ImageProcessor()
-video_processor = VideoProcessor()
-detector = DeepfakeDetector()
-detector.load_model()
+# Decode images only as large as the face and quality stages need
+image_processor = ImageProcessor(
+    decode_min_side=max(Config.FACE_DETECT_MIN_SIDE, Config.QUALITY_MIN_SIDE)
+    if Config.REDUCED_DECODE_ENABLED else None,
+    blur_reference_side=Config.QUALITY_MIN_SIDE
+)
+video_settings = dict(
+    sampler=Config.FRAME_SAMPLER,
+    probes_per_frame=Config.FRAME_PROBES_PER_FRAME,
+    cut_threshold=Config.SHOT_CUT_THRESHOLD,
+    duplicate_threshold=Config.DUPLICATE_FRAME_THRESHOLD,
+    backend=Config.VIDEO_DECODE_BACKEND,
+    decode_threads=Config.VIDEO_DECODE_THREADS
+)
+frame_cache_settings = dict(
+    cache_dir=Config.FRAME_CACHE_DIR,
+    max_bytes=Config.FRAME_CACHE_MAX_BYTES
+) if Config.FRAME_CACHE_ENABLED else None
+video_processor = VideoProcessor(
+    frame_cache=FrameCache(**frame_cache_settings) if frame_cache_settings else None,
+    **video_settings
+)
+segment_processor = SegmentProcessor(
+    video_settings,
+    cache_settings=frame_cache_settings,
+    workers=Config.SEGMENT_WORKERS,
+    min_seconds=Config.SEGMENT_MIN_SECONDS,
+    segment_seconds=Config.SEGMENT_SECONDS,
+    frames_per_segment=Config.SEGMENT_FRAMES,
+    inference_address=Config.INFERENCE_SERVER_ADDRESS or None
+) if Config.SEGMENT_PARALLEL_ENABLED else None
+model_registry = ModelRegistry(
+    Config.MODEL_REGISTRY_DIR,
+    fallback_model_path=Config.MODEL_PATH,
+    poll_interval=Config.MODEL_REGISTRY_POLL_SECONDS
+)
+
+# Requests get their detector from model_source: the registry in-process,
+# or a client of the standalone inference server when one is configured
+if Config.INFERENCE_SERVER_ADDRESS:
+    model_source = InferenceClient(Config.INFERENCE_SERVER_ADDRESS, timeout=Config.INFERENCE_SERVER_TIMEOUT)
+else:
+    model_source = model_registry
+    model_registry.current()
+screener = QualityScreener()
+
+# Separate pools so a burst of videos can't starve image analyses
+image_pool = AdmissionPool(
+    'image',
+    max_active=Config.IMAGE_MAX_CONCURRENT,
+    max_waiting=Config.IMAGE_MAX_QUEUED,
+    max_wait=Config.ADMISSION_MAX_WAIT_SECONDS,
+    max_waiting_per_user=Config.ADMISSION_MAX_QUEUED_PER_USER
+)
+video_pool = AdmissionPool(
+    'video',
+    max_active=Config.VIDEO_MAX_CONCURRENT,
+    max_waiting=Config.VIDEO_MAX_QUEUED,
+    max_wait=Config.ADMISSION_MAX_WAIT_SECONDS,
+    max_waiting_per_user=Config.ADMISSION_MAX_QUEUED_PER_USER
+)
+rate_limiter = create_rate_limiter(Config)
+detail_analyzer = DetailAnalyzer(image_processor, video_processor)
+thumbnail_cache = ThumbnailCache(
+    Config.THUMBNAIL_CACHE_DIR,
+    image_processor,
+    video_settings,
+    sizes={'thumbnail': Config.THUMBNAIL_MAX_SIDE, 'poster': Config.POSTER_MAX_SIDE},
+    quality=Config.THUMBNAIL_JPEG_QUALITY
+)
+
+# Shape of one model input: (height, width, channels)
+input_shape = (image_processor.target_size[1], image_processor.target_size[0], 3)
+
+INFERENCE_MODES = ('full', 'faces')
 
 
 @detection_bp.route('/analyze/image', methods=['POST'])
 @jwt_required()
+@rate_limited(rate_limiter, 'image')
+@admission_required(image_pool)
+@profiled('image')
+@QUEUE_DEPTH.track('image')
 def analyze_image():
     """
     Analyze uploaded image for deepfake detection
@@ -26,6 +124,10 @@ def analyze_image():
     try:
         current_user_id = get_jwt_identity()
         
+        # Pin the model for the whole request so a concurrent rollout
+        # doesn't mix versions within one analysis
+        model_version, detector = model_source.current()
+        
         # Check if file is present
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
@@ -39,38 +141,119 @@ def analyze_image():
         if not allowed_file(file.filename, 'image'):
             return jsonify({'error': 'Invalid file type. Only images are allowed.'}), 400
         
-        # Save uploaded file
+        # Whole-input or face-crop inference
+        inference_mode = request.values.get('mode', current_app.config['INFERENCE_MODE'])
+        if inference_mode not in INFERENCE_MODES:
+            return jsonify({'error': f'Invalid mode. Must be one of: {", ".join(INFERENCE_MODES)}'}), 400
+        
+        # Secondary analyses to compute before responding; the rest are
+        # available later from /history/<id>/details
+        try:
+            include = parse_include(request.values.get('include', current_app.config['ANALYZE_INCLUDE']))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Small images are analyzed straight from memory while the copy for
+        # history is written in the background; larger ones go to disk first
         upload_folder = current_app.config['UPLOAD_FOLDER']
-        file_path, filename = save_upload_file(file, upload_folder)
+        write_future = None
+        with time_stage('image', 'upload_save'):
+            image_bytes = read_upload_bytes(file, current_app.config['IN_MEMORY_IMAGE_MAX_BYTES'])
+            if image_bytes is not None:
+                file_path, filename = reserve_upload_path(file.filename, upload_folder)
+                write_future = save_bytes_async(image_bytes, file_path)
+            else:
+                file_path, filename, _ = save_upload_file(file, upload_folder)
         
         try:
             # Get file size
-            file_size = get_file_size(file_path)
+            if image_bytes is not None:
+                file_size = round(len(image_bytes) / (1024 * 1024), 2)
+            else:
+                file_size = get_file_size(file_path)
+            
+            # Decode once, at reduced resolution for large JPEGs, and share
+            # the pixels between stages
+            with time_stage('image', 'decode'):
+                img, decode_info = image_processor.decode_image(
+                    image_bytes if image_bytes is not None else file_path
+                )
             
-            # Analyze image quality
-            quality_metrics = image_processor.analyze_image_quality(file_path)
+            # Analyze image quality (the cascade's screener uses it too)
+            details = {}
+            quality_metrics = None
+            if 'quality' in include or current_app.config['CASCADE_ENABLED']:
+                with time_stage('image', 'quality'):
+                    quality_metrics = details['quality'] = detail_analyzer.image_quality(img, decode_info)
             
-            # Preprocess image
-            processed_image = image_processor.preprocess_image(file_path)
+            # Detect faces (scored in 'faces' mode)
+            face_boxes = []
+            face_count = None
+            if inference_mode == 'faces' or 'faces' in include:
+                with time_stage('image', 'face_detection'):
+                    face_boxes = image_processor.detect_faces(img)
+                face_count = len(face_boxes)
+            face_analysis = None
+            cascade_stage = None
             
-            # Detect deepfake
-            prediction, confidence = detector.predict_image(processed_image)
+            if inference_mode == 'faces' and face_boxes:
+                # Every face crop goes through the model in one batch
+                face_boxes = face_boxes[:current_app.config['MAX_FACES_PER_BATCH']]
+                with time_stage('image', 'preprocess'):
+                    face_batch, _ = image_processor.extract_face_batch(
+                        img,
+                        boxes=face_boxes,
+                        out=buffer_pool.get('face_batch', len(face_boxes), input_shape)
+                    )
+                
+                with time_stage('image', 'inference'):
+                    face_analysis = detector.analyze_faces(
+                        face_batch,
+                        [{'box': list(box)} for box in face_boxes],
+                        aggregate='any'
+                    )
+                prediction = face_analysis['overall_prediction']
+                confidence = face_analysis['confidence']
+            else:
+                # Preprocess image
+                with time_stage('image', 'preprocess'):
+                    processed_image = image_processor.preprocess_image(
+                        img,
+                        normalize=False,
+                        out=buffer_pool.get('image_batch', 1, input_shape)
+                    )
+                
+                # Detect deepfake, screening first when the cascade is on
+                with time_stage('image', 'inference'):
+                    if current_app.config['CASCADE_ENABLED']:
+                        prediction, confidence, cascade_stage = CascadeDetector(
+                            detector,
+                            screener,
+                            low=current_app.config['CASCADE_BAND_LOW'],
+                            high=current_app.config['CASCADE_BAND_HIGH']
+                        ).predict_image(processed_image, quality_metrics)
+                    else:
+                        prediction, confidence = detector.predict_image(processed_image)
             
-            # Extract faces (optional - for additional analysis)
-            faces = image_processor.extract_faces(file_path)
-            face_count = len(faces)
+            if face_count is not None:
+                details['faces'] = detail_analyzer.image_faces(face_boxes, face_analysis)
             
             # Save to search history
-            search_record = SearchHistory(
-                user_id=current_user_id,
-                file_name=filename,
-                file_type='image',
-                detection_result=prediction,
-                confidence_score=confidence,
-                file_path=file_path
-            )
-            db.session.add(search_record)
-            db.session.commit()
+            with time_stage('image', 'db_commit'):
+                # Never record history for a file that didn't reach disk
+                if write_future is not None:
+                    write_future.result()
+                analysis_id = history_writer.record(
+                    user_id=current_user_id,
+                    file_name=filename,
+                    file_type='image',
+                    detection_result=prediction,
+                    confidence_score=confidence,
+                    file_path=file_path,
+                    model_version=model_version,
+                    details=details
+                )
+            RESULTS.inc('image', prediction)
             
             # Prepare response
             response_data = {
@@ -80,16 +263,22 @@ def analyze_image():
                 'file_type': 'image',
                 'prediction': prediction,
                 'confidence': round(confidence * 100, 2),
+                'model_version': model_version,
                 'face_count': face_count,
+                'inference_mode': inference_mode if face_analysis else 'full',
+                'face_analysis': face_analysis,
+                'cascade_stage': cascade_stage,
                 'quality_metrics': quality_metrics,
                 'timestamp': datetime.utcnow().isoformat(),
-                'analysis_id': search_record.id
+                'analysis_id': analysis_id
             }
             
-            return jsonify(response_data), 200
+            return respond(response_data, 200)
             
         except Exception as e:
-            # Delete uploaded file on error
+            # Delete uploaded file on error, after any background write
+            if write_future is not None:
+                write_future.exception()
             delete_file(file_path)
             raise e
             
@@ -98,8 +287,244 @@ def analyze_image():
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
 
+@contextmanager
+def video_stage(stage, emit=None):
+    """
+    time_stage for the video pipeline that also reports the stage through
+    emit when the analysis is being streamed
+    """
+    if emit is not None:
+        emit('stage', {'stage': stage})
+    with time_stage('video', stage):
+        yield
+
+
+def stream_frame_analysis(detector, frames, frame_numbers, emit, tally):
+    """
+    analyze_frames in small chunks, emitting every frame result with the
+    running fake/real tally as soon as its chunk is scored
+    Returns: Frame results in order
+    """
+    chunk = current_app.config['STREAM_FRAME_CHUNK']
+    frame_results = []
+    for start in range(0, len(frames), chunk):
+        analysis = detector.analyze_frames(
+            frames[start:start + chunk],
+            frame_numbers=frame_numbers[start:start + chunk]
+        )
+        for result in analysis['frame_results']:
+            emit_frame(result, emit, tally)
+        frame_results.extend(analysis['frame_results'])
+    return frame_results
+
+
+def emit_frame(result, emit, tally):
+    """Update the running tally with one frame result and emit both"""
+    tally[f"{result['prediction']}_frames"] += 1
+    tally['total_frames'] += 1
+    emit('frame', {'result': result, 'tally': dict(tally)})
+
+
+def run_video_analysis(file_path, filename, content_hash, user_id, model_version, detector, inference_mode,
+                       include=(), emit=None):
+    """
+    Run the video pipeline on a saved upload and record it in the search
+    history
+    content_hash: SHA-256 of the upload from save_upload_file, which keys
+                  the frame cache
+    include: secondary analyses (quality, faces, frames) to compute before
+             returning; per-frame results are always computed when
+             streaming or when the video is split into segments
+    emit: optional callback emit(event, data) for streaming progress:
+          'stage' when each stage starts and 'frame' for each per-frame
+          result together with the running tally
+    Returns: Response dictionary
+    """
+    # Get file size
+    file_size = get_file_size(file_path)
+    
+    # Get video information
+    with video_stage('probe', emit):
+        video_info = video_processor.get_video_info(file_path)
+    
+    tally = {'fake_frames': 0, 'real_frames': 0, 'total_frames': 0}
+    
+    def on_segment(segment):
+        for result in segment['frame_results']:
+            emit_frame(result, emit, tally)
+    
+    # Long videos are split into segments scored in parallel worker
+    # processes ('full' mode only)
+    face_analysis = None
+    face_index = None
+    cascade_stage = None
+    frame_analysis = None
+    details = {}
+    if (inference_mode == 'full' and segment_processor is not None
+            and segment_processor.should_split(video_info)):
+        with video_stage('segments', emit):
+            prediction, confidence, frame_analysis = segment_processor.analyze(
+                file_path,
+                video_info,
+                detector,
+                on_segment=on_segment if emit is not None else None,
+                content_hash=content_hash
+            )
+        frames_analyzed = frame_analysis['total_frames']
+        
+        if 'faces' in include:
+            with video_stage('face_detection', emit):
+                frames, frame_numbers = video_processor.sample_frames(
+                    file_path, max_frames=30, content_hash=content_hash
+                )
+                details['faces'] = detail_analyzer.video_faces(frames, frame_numbers)
+    else:
+        # Extract frames
+        with video_stage('decode', emit):
+            frames, frame_numbers = video_processor.sample_frames(
+                file_path,
+                max_frames=30,
+                out=buffer_pool.get('video_frames', 30, input_shape),
+                content_hash=content_hash
+            )
+        
+        # Preprocess frames (stays uint8; the detector normalizes)
+        with video_stage('preprocess', emit):
+            processed_frames = video_processor.preprocess_frames(frames, normalize=False)
+        
+        # In 'faces' mode, every face in every sampled frame is scored
+        # in a single batch
+        if inference_mode == 'faces':
+            max_faces = current_app.config['MAX_FACES_PER_BATCH']
+            with video_stage('face_detection', emit):
+                face_batch, face_index = video_processor.extract_face_batch(
+                    frames,
+                    frame_numbers=frame_numbers,
+                    max_faces=max_faces,
+                    out=buffer_pool.get('face_batch', max_faces, input_shape)
+                )
+            
+            if len(face_batch):
+                with video_stage('inference', emit):
+                    face_analysis = detector.analyze_faces(
+                        face_batch,
+                        [{'frame_number': face['frame_number'], 'box': list(face['box'])} for face in face_index],
+                        aggregate='majority'
+                    )
+                prediction = face_analysis['overall_prediction']
+                confidence = face_analysis['confidence']
+        
+        # Faces mode already detected them; only 'full' mode detects here
+        if inference_mode == 'faces' or 'faces' in include:
+            with video_stage('face_detection', emit):
+                details['faces'] = detail_analyzer.video_faces(frames, frame_numbers, face_analysis, face_index)
+        
+        # Detect deepfake, screening first when the cascade is on
+        if face_analysis is None:
+            with video_stage('inference', emit):
+                if current_app.config['CASCADE_ENABLED']:
+                    prediction, confidence, cascade_stage = CascadeDetector(
+                        detector,
+                        screener,
+                        low=current_app.config['CASCADE_BAND_LOW'],
+                        high=current_app.config['CASCADE_BAND_HIGH']
+                    ).predict_video(processed_frames)
+                else:
+                    prediction, confidence = detector.predict_video(processed_frames)
+        
+        
+        # Analyze individual frames (streamed, or when requested)
+        if emit is not None:
+            with video_stage('frame_analysis', emit):
+                frame_analysis = summarize_frame_results(
+                    stream_frame_analysis(detector, processed_frames, frame_numbers, emit, tally)
+                )
+        elif 'frames' in include:
+            with video_stage('frame_analysis', emit):
+                frame_analysis = detector.analyze_frames(processed_frames, frame_numbers=frame_numbers)
+        frames_analyzed = len(frames)
+    
+    # Analyze video quality
+    quality_metrics = None
+    if 'quality' in include:
+        with video_stage('quality', emit):
+            quality_metrics = details['quality'] = video_processor.analyze_video_quality(file_path)
+    
+    # Save to search history
+    with video_stage('db_commit', emit):
+        analysis_id = history_writer.record(
+            user_id=user_id,
+            file_name=filename,
+            file_type='video',
+            detection_result=prediction,
+            confidence_score=confidence,
+            file_path=file_path,
+            model_version=model_version,
+            frame_results=frame_analysis['frame_results'] if frame_analysis else None,
+            details=details
+        )
+    RESULTS.inc('video', prediction)
+    
+    # Prepare response
+    return {
+        'success': True,
+        'file_name': filename,
+        'file_size_mb': file_size,
+        'file_type': 'video',
+        'prediction': prediction,
+        'confidence': round(confidence * 100, 2),
+        'model_version': model_version,
+        'video_info': video_info,
+        'frames_analyzed': frames_analyzed,
+        'frame_analysis': frame_analysis,
+        'inference_mode': inference_mode if face_analysis else 'full',
+        'face_analysis': face_analysis,
+        'cascade_stage': cascade_stage,
+        'quality_metrics': quality_metrics,
+        'timestamp': datetime.utcnow().isoformat(),
+        'analysis_id': analysis_id
+    }
+
+
+def validate_video_upload():
+    """
+    Check the uploaded video, requested inference mode and detail sections
+    Returns: (file, inference_mode, include, None) or
+             (None, None, None, error response)
+    """
+    # Check if file is present
+    if 'file' not in request.files:
+        return None, None, None, (jsonify({'error': 'No file provided'}), 400)
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return None, None, None, (jsonify({'error': 'No file selected'}), 400)
+    
+    # Validate file type
+    if not allowed_file(file.filename, 'video'):
+        return None, None, None, (jsonify({'error': 'Invalid file type. Only videos are allowed.'}), 400)
+    
+    # Whole-input or face-crop inference
+    inference_mode = request.values.get('mode', current_app.config['INFERENCE_MODE'])
+    if inference_mode not in INFERENCE_MODES:
+        return None, None, None, (jsonify({'error': f'Invalid mode. Must be one of: {", ".join(INFERENCE_MODES)}'}), 400)
+    
+    # Secondary analyses to compute before responding
+    try:
+        include = parse_include(request.values.get('include', current_app.config['ANALYZE_INCLUDE']))
+    except ValueError as e:
+        return None, None, None, (jsonify({'error': str(e)}), 400)
+    
+    return file, inference_mode, include, None
+
+
 @detection_bp.route('/analyze/video', methods=['POST'])
 @jwt_required()
+@rate_limited(rate_limiter, 'video')
+@admission_required(video_pool)
+@profiled('video')
+@QUEUE_DEPTH.track('video')
 def analyze_video():
     """
     Analyze uploaded video for deepfake detection
@@ -107,74 +532,25 @@ def analyze_video():
     try:
         current_user_id = get_jwt_identity()
         
-        # Check if file is present
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['file']
-        
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
+        # Pin the model for the whole request so a concurrent rollout
+        # doesn't mix versions within one analysis
+        model_version, detector = model_source.current()
         
-        # Validate file type
-        if not allowed_file(file.filename, 'video'):
-            return jsonify({'error': 'Invalid file type. Only videos are allowed.'}), 400
+        file, inference_mode, include, error = validate_video_upload()
+        if error:
+            return error
         
         # Save uploaded file
         upload_folder = current_app.config['UPLOAD_FOLDER']
-        file_path, filename = save_upload_file(file, upload_folder)
+        with time_stage('video', 'upload_save'):
+            file_path, filename, content_hash = save_upload_file(file, upload_folder)
         
         try:
-            # Get file size
-            file_size = get_file_size(file_path)
-            
-            # Get video information
-            video_info = video_processor.get_video_info(file_path)
-            
-            # Extract frames
-            frames = video_processor.extract_frames(file_path, max_frames=30)
-            
-            # Preprocess frames
-            processed_frames = video_processor.preprocess_frames(frames)
-            
-            # Detect deepfake
-            prediction, confidence = detector.predict_video(processed_frames)
-            
-            # Analyze individual frames (optional)
-            frame_analysis = detector.analyze_frames(processed_frames)
-            
-            # Analyze video quality
-            quality_metrics = video_processor.analyze_video_quality(file_path)
-            
-            # Save to search history
-            search_record = SearchHistory(
-                user_id=current_user_id,
-                file_name=filename,
-                file_type='video',
-                detection_result=prediction,
-                confidence_score=confidence,
-                file_path=file_path
+            response_data = run_video_analysis(
+                file_path, filename, content_hash, current_user_id, model_version, detector, inference_mode,
+                include
             )
-            db.session.add(search_record)
-            db.session.commit()
-            
-            # Prepare response
-            response_data = {
-                'success': True,
-                'file_name': filename,
-                'file_size_mb': file_size,
-                'file_type': 'video',
-                'prediction': prediction,
-                'confidence': round(confidence * 100, 2),
-                'video_info': video_info,
-                'frames_analyzed': len(frames),
-                'frame_analysis': frame_analysis,
-                'quality_metrics': quality_metrics,
-                'timestamp': datetime.utcnow().isoformat(),
-                'analysis_id': search_record.id
-            }
-            
-            return jsonify(response_data), 200
+            return respond(response_data, 200)
             
         except Exception as e:
             # Delete uploaded file on error
@@ -186,8 +562,99 @@ def analyze_video():
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
 
+@detection_bp.route('/analyze/video/stream', methods=['POST'])
+@jwt_required()
+@rate_limited(rate_limiter, 'video')
+@profiled('video_stream')
+def analyze_video_stream():
+    """
+    Analyze uploaded video, streaming progress as Server-Sent Events:
+    'stage' events as each stage starts, 'frame' events with each per-frame
+    result and the running tally, then a 'result' event with the same body
+    as /analyze/video (or an 'error' event). Comment lines are sent as
+    keepalives while a stage runs so proxies don't drop the connection.
+    A profile covers the request thread (validation and upload), not the
+    background analysis.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        model_version, detector = model_source.current()
+        
+        file, inference_mode, include, error = validate_video_upload()
+        if error:
+            return error
+        
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+    
+    # The slot is held until the background analysis finishes, not just
+    # until the response starts streaming
+    try:
+        ticket = video_pool.acquire(current_user_id)
+    except Overloaded as e:
+        return overloaded_response(e)
+    
+    try:
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        with time_stage('video', 'upload_save'):
+            file_path, filename, content_hash = save_upload_file(file, upload_folder)
+        
+    except Exception as e:
+        video_pool.release(ticket)
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+    
+    # The analysis runs in its own thread and app context, so it finishes
+    # and is saved to history even if the client disconnects
+    app = current_app._get_current_object()
+    events = queue.Queue()
+    
+    def analyze():
+        with app.app_context(), QUEUE_DEPTH.track('video_stream'):
+            try:
+                events.put(('result', run_video_analysis(
+                    file_path,
+                    filename,
+                    content_hash,
+                    current_user_id,
+                    model_version,
+                    detector,
+                    inference_mode,
+                    include,
+                    emit=lambda event, data: events.put((event, data))
+                )))
+            except Exception as e:
+                db.session.rollback()
+                delete_file(file_path)
+                events.put(('error', {'error': f'Analysis failed: {str(e)}'}))
+            finally:
+                video_pool.release(ticket)
+                events.put(None)
+    
+    threading.Thread(target=analyze, daemon=True).start()
+    keepalive = current_app.config['STREAM_KEEPALIVE_SECONDS']
+    
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=keepalive)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            if item is None:
+                return
+            event, data = item
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @detection_bp.route('/history', methods=['GET'])
 @jwt_required()
+@conditional(lambda: [ChangeCounter.user_scope(get_jwt_identity())])
 def get_user_history():
     """
     Get analysis history for current user
@@ -215,14 +682,14 @@ def get_user_history():
         
         history_items = [item.to_dict() for item in pagination.items]
         
-        return jsonify({
+        return respond({
             'success': True,
             'history': history_items,
             'total': pagination.total,
             'page': pagination.page,
             'per_page': pagination.per_page,
             'total_pages': pagination.pages
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch history: {str(e)}'}), 500
@@ -230,6 +697,7 @@ def get_user_history():
 
 @detection_bp.route('/history/<int:analysis_id>', methods=['GET'])
 @jwt_required()
+@conditional(lambda: [ChangeCounter.user_scope(get_jwt_identity())])
 def get_analysis_details(analysis_id):
     """
     Get detailed information about a specific analysis
@@ -244,17 +712,191 @@ def get_analysis_details(analysis_id):
         ).first()
         
         if not analysis:
+            reason = history_writer.dropped_reason(analysis_id, current_user_id)
+            if reason:
+                return jsonify({'error': f'Analysis {analysis_id} could not be saved: {reason}'}), 410
             return jsonify({'error': 'Analysis not found'}), 404
         
-        return jsonify({
+        return respond({
             'success': True,
             'analysis': analysis.to_dict()
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch analysis: {str(e)}'}), 500
 
 
+@detection_bp.route('/history/<int:analysis_id>/details', methods=['GET'])
+@jwt_required()
+@conditional(lambda: [ChangeCounter.user_scope(get_jwt_identity())])
+def get_analysis_secondary_details(analysis_id):
+    """
+    Get secondary analyses of an analysis, e.g. ?include=quality,faces,frames
+    (all by default). Sections not computed with the analysis are computed
+    from the saved upload on first request and stored for later ones.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        
+        try:
+            sections = parse_include(request.args.get('include'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        analysis = SearchHistory.query.filter_by(
+            id=analysis_id,
+            user_id=current_user_id
+        ).first()
+        
+        if not analysis:
+            reason = history_writer.dropped_reason(analysis_id, current_user_id)
+            if reason:
+                return jsonify({'error': f'Analysis {analysis_id} could not be saved: {reason}'}), 410
+            return jsonify({'error': 'Analysis not found'}), 404
+        
+        # Per-frame scores are only recomputed for videos stored without
+        # them, on the model version that produced the verdict
+        detector = None
+        if 'frames' in sections and analysis.file_type == 'video' and analysis.frames is None:
+            try:
+                _, detector = model_source.get(analysis.model_version or DEFAULT_VERSION)
+            except LookupError as e:
+                return jsonify({'error': str(e)}), 409
+        
+        try:
+            details = detail_analyzer.load(analysis, sections, detector)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 410
+        
+        return respond({
+            'success': True,
+            'analysis_id': analysis_id,
+            'details': details
+        }, 200)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to fetch analysis details: {str(e)}'}), 500
+
+
+@detection_bp.route('/history/media-urls', methods=['GET'])
+@jwt_required()
+def get_media_urls():
+    """
+    Signed URLs for <img> and <video> tags, which can't send the
+    Authorization header, e.g. ?ids=1,2,3&kinds=media,thumbnail. Each URL
+    grants access to one file of one of the user's analyses until it
+    expires.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        history_writer.flush()
+        
+        try:
+            ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of analysis ids'}), 400
+        
+        kinds = [k.strip() for k in request.args.get('kinds', 'media,thumbnail').split(',') if k.strip()]
+        unknown = [k for k in kinds if k not in MEDIA_KINDS]
+        if unknown:
+            return jsonify({'error': f"Unknown kinds: {', '.join(unknown)}. "
+                                     f"Must be any of: {', '.join(MEDIA_KINDS)}"}), 400
+        
+        if len(ids) > 100:
+            return jsonify({'error': 'At most 100 ids per request'}), 400
+        
+        owned = db.session.query(SearchHistory.id).filter(
+            SearchHistory.id.in_(ids),
+            SearchHistory.user_id == current_user_id
+        ).all()
+        
+        urls = {}
+        expires = None
+        for (analysis_id,) in owned:
+            urls[analysis_id] = {}
+            for kind in kinds:
+                urls[analysis_id][kind], expires = sign_media_url(analysis_id, kind)
+        
+        return respond({
+            'success': True,
+            'urls': urls,
+            'expires': expires
+        }, 200)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to sign media URLs: {str(e)}'}), 500
+
+
+@detection_bp.route('/history/<int:analysis_id>/media', methods=['GET'])
+def get_analysis_media(analysis_id):
+    """
+    Serve the original upload of an analysis, authorized by a signed
+    ?token= from /history/media-urls. Supports Range requests so video
+    players can seek, and conditional requests.
+    """
+    try:
+        if not verify_media_token(request.args.get('token'), analysis_id, 'media'):
+            return jsonify({'error': 'Invalid or expired media link'}), 403
+        
+        analysis = SearchHistory.query.get(analysis_id)
+        
+        if not analysis:
+            return jsonify({'error': 'Analysis not found'}), 404
+        
+        if not analysis.file_path or not os.path.exists(analysis.file_path):
+            return jsonify({'error': 'Upload is no longer available'}), 410
+        
+        # Werkzeug answers Range requests with 206 and streams through the
+        # server's file wrapper (sendfile where supported), or hands the
+        # file to the front server when USE_X_SENDFILE is on
+        response = send_file(
+            os.path.abspath(analysis.file_path),
+            conditional=True,
+            max_age=current_app.config['MEDIA_MAX_AGE_SECONDS']
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Cache-Control'] = f"private, max-age={current_app.config['MEDIA_MAX_AGE_SECONDS']}"
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch media: {str(e)}'}), 500
+
+
+@detection_bp.route('/history/<int:analysis_id>/<any(thumbnail, poster):kind>', methods=['GET'])
+def get_analysis_thumbnail(analysis_id, kind):
+    """
+    Serve a JPEG thumbnail or poster frame of an analysis' upload,
+    rendered on first request and cached on disk. Authorized by a signed
+    ?token= from /history/media-urls.
+    """
+    try:
+        if not verify_media_token(request.args.get('token'), analysis_id, kind):
+            return jsonify({'error': 'Invalid or expired media link'}), 403
+        
+        analysis = SearchHistory.query.get(analysis_id)
+        
+        if not analysis:
+            return jsonify({'error': 'Analysis not found'}), 404
+        
+        try:
+            path = thumbnail_cache.get(analysis, kind)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e)}), 410
+        
+        response = send_file(
+            path,
+            mimetype='image/jpeg',
+            conditional=True,
+            max_age=current_app.config['MEDIA_MAX_AGE_SECONDS']
+        )
+        response.headers['Cache-Control'] = f"private, max-age={current_app.config['MEDIA_MAX_AGE_SECONDS']}"
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch {kind}: {str(e)}'}), 500
+
+
 @detection_bp.route('/history/<int:analysis_id>', methods=['DELETE'])
 @jwt_required()
 def delete_analysis(analysis_id):
@@ -263,6 +905,7 @@ def delete_analysis(analysis_id):
     """
     try:
         current_user_id = get_jwt_identity()
+        history_writer.flush()
         
         # Get analysis record
         analysis = SearchHistory.query.filter_by(
@@ -273,18 +916,20 @@ def delete_analysis(analysis_id):
         if not analysis:
             return jsonify({'error': 'Analysis not found'}), 404
         
-        # Delete associated file
+        # Delete associated file and its thumbnails
         if analysis.file_path:
             delete_file(analysis.file_path)
+        thumbnail_cache.evict(analysis.id)
         
         # Delete database record
         db.session.delete(analysis)
+        ChangeCounter.bump(db.session, [ChangeCounter.user_scope(current_user_id), ChangeCounter.GLOBAL])
         db.session.commit()
         
-        return jsonify({
+        return respond({
             'success': True,
             'message': 'Analysis deleted successfully'
-        }), 200
+        }, 200)
         
     except Exception as e:
         db.session.rollback()
@@ -293,6 +938,7 @@ def delete_analysis(analysis_id):
 
 @detection_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional(lambda: [ChangeCounter.user_scope(get_jwt_identity())])
 def get_user_stats():
     """
     Get statistics for current user
@@ -312,7 +958,7 @@ def get_user_stats():
         
         avg_confidence = sum(a.confidence_score for a in analyses) / total_analyses if total_analyses > 0 else 0
         
-        return jsonify({
+        return respond({
             'success': True,
             'stats': {
                 'total_analyses': total_analyses,
@@ -322,7 +968,7 @@ def get_user_stats():
                 'videos_analyzed': video_count,
                 'average_confidence': round(avg_confidence * 100, 2)
             }
-        }), 200
+        }, 200)
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch stats: {str(e)}'}), 500
\ No newline at end of file
@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+
+from utils.image_processor import ImageProcessor
+
+
+def make_jpeg(blur_sigma):
+    """Encode a 6000x5800 JPEG, large enough to decode at 1/8 scale"""
+    rng = np.random.default_rng(0)
+    tiles = rng.integers(0, 255, (58, 60), dtype=np.uint8)
+    img = cv2.resize(tiles, (6000, 5800), interpolation=cv2.INTER_NEAREST)
+    if blur_sigma:
+        img = cv2.GaussianBlur(img, (0, 0), blur_sigma)
+    ok, encoded = cv2.imencode('.jpg', cv2.cvtColor(img, cv2.COLOR_GRAY2BGR), [cv2.IMWRITE_JPEG_QUALITY, 95])
+    assert ok
+    return encoded.tobytes()
+
+
+def quality_at(image_bytes, decode_min_side):
+    processor = ImageProcessor(decode_min_side=decode_min_side)
+    img, decode_info = processor.decode_image(image_bytes)
+    metrics = processor.analyze_image_quality(img, original_size=(decode_info['width'], decode_info['height']))
+    return decode_info['scale'], metrics
+
+
+def test_blur_is_independent_of_decode_scale():
+    # Before blur was measured at a reference resolution, sigma 2 scored
+    # about 4 at full size (blurry) and about 1400 at 1/8 (sharp)
+    for blur_sigma in (2, 20):
+        image_bytes = make_jpeg(blur_sigma)
+        full_scale, full = quality_at(image_bytes, None)
+        reduced_scale, reduced = quality_at(image_bytes, 720)
+
+        assert (full_scale, reduced_scale) == (1, 8)
+        assert full['is_blurry'] == reduced['is_blurry'] == (blur_sigma > 10)
+        # The DCT reduction and the area resize filter edges a little
+        # differently, so scores agree only roughly
+        assert 0.5 <= reduced['blur_score'] / full['blur_score'] <= 2
+        assert (full['width'], full['height']) == (reduced['width'], reduced['height']) == (6000, 5800)
+
+
+if __name__ == '__main__':
+    test_blur_is_independent_of_decode_scale()
+    print("✅ Blur is independent of the decode scale")
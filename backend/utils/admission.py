@@ -0,0 +1,187 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import get_jwt_identity
+
+from utils.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_WAIT
+
+
+class Overloaded(Exception):
+    """Raised when a pool cannot admit more work"""
+
+    def __init__(self, message, status_code, retry_after):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('user', 'granted')
+
+    def __init__(self, user):
+        self.user = user
+        self.granted = False
+
+
+class AdmissionPool:
+    """
+    Bounded concurrency for one kind of work (e.g. video analyses) with a
+    bounded wait queue in front of it.
+
+    Up to max_active requests run at once and up to max_waiting more wait
+    for a slot, at most max_waiting_per_user of them from one user. A
+    request that finds the queue full is rejected at once with 429, and one
+    that waits longer than max_wait seconds gets 503, both with a
+    Retry-After estimated from recent service times. Limits are per
+    process; multiply by the worker count for the whole server.
+
+    Waiting requests are queued per user, and a freed slot goes to the
+    waiting user holding the fewest slots (round-robin among ties), so one
+    user's backlog can't delay everyone else's requests.
+    """
+
+    def __init__(self, name, max_active, max_waiting, max_wait=10.0, max_waiting_per_user=None):
+        self.name = name
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.max_waiting_per_user = max_waiting_per_user or max_waiting
+
+        self.active = 0
+        self.waiting = 0
+        self._active_by_user = {}
+        # user -> deque of _Waiter; order of users is the round-robin order
+        self._queues = OrderedDict()
+        # Moving average of how long admitted work holds a slot
+        self._service_time = None
+        self._cond = threading.Condition()
+
+    def retry_after(self):
+        """Seconds until a slot is likely free for a new request"""
+        service_time = self._service_time or 1.0
+        return max(1, math.ceil(service_time * (self.waiting + 1) / self.max_active))
+
+    def _update_gauges(self):
+        ADMISSION_ACTIVE.set(self.name, value=self.active)
+        ADMISSION_QUEUED.set(self.name, value=self.waiting)
+
+    def _admit(self, user):
+        self.active += 1
+        self._active_by_user[user] = self._active_by_user.get(user, 0) + 1
+
+    def _dequeue(self, waiter):
+        queue = self._queues[waiter.user]
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[waiter.user]
+        self.waiting -= 1
+
+    def _grant_next(self):
+        """Hand free slots to waiting requests, fairest user first"""
+        while self._queues and self.active < self.max_active:
+            user = min(self._queues, key=lambda u: self._active_by_user.get(u, 0))
+            waiter = self._queues[user][0]
+            self._dequeue(waiter)
+            if user in self._queues:
+                self._queues.move_to_end(user)
+            waiter.granted = True
+            self._admit(user)
+        self._cond.notify_all()
+
+    def acquire(self, user=None):
+        """
+        Take a slot, waiting in the queue if all are busy
+        user: identity whose requests share a fair-share queue
+        Returns: Ticket to pass to release()
+        Raises: Overloaded when the queue is full or the wait times out
+        """
+        start = time.monotonic()
+        with self._cond:
+            # Don't overtake requests that are already queued
+            if self.active < self.max_active and self.waiting == 0:
+                self._admit(user)
+                self._update_gauges()
+                ADMISSION_WAIT.observe(self.name, value=0.0)
+                return user, start
+
+            queue = self._queues.get(user)
+            if self.waiting >= self.max_waiting or (queue and len(queue) >= self.max_waiting_per_user):
+                ADMISSION_REJECTED.inc(self.name, 'queue_full')
+                raise Overloaded(
+                    f"Too many {self.name} analyses queued, try again later",
+                    429,
+                    self.retry_after()
+                )
+
+            waiter = _Waiter(user)
+            self._queues.setdefault(user, deque()).append(waiter)
+            self.waiting += 1
+            self._update_gauges()
+            deadline = start + self.max_wait
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._dequeue(waiter)
+                    self._update_gauges()
+                    ADMISSION_REJECTED.inc(self.name, 'timeout')
+                    raise Overloaded(
+                        f"Server busy with {self.name} analyses, try again later",
+                        503,
+                        self.retry_after()
+                    )
+                self._cond.wait(remaining)
+
+            self._update_gauges()
+
+        admitted_at = time.monotonic()
+        ADMISSION_WAIT.observe(self.name, value=admitted_at - start)
+        return user, admitted_at
+
+    def release(self, ticket):
+        """Free a slot taken by acquire()"""
+        user, admitted_at = ticket
+        elapsed = time.monotonic() - admitted_at
+        with self._cond:
+            self.active -= 1
+            self._active_by_user[user] -= 1
+            if not self._active_by_user[user]:
+                del self._active_by_user[user]
+            if self._service_time is None:
+                self._service_time = elapsed
+            else:
+                self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+            self._grant_next()
+            self._update_gauges()
+
+
+def overloaded_response(error):
+    """JSON error response with a Retry-After header"""
+    response = jsonify({'error': error.message, 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status_code
+
+
+def admission_required(pool):
+    """
+    Decorator to run a route inside an admission pool slot, queued fairly
+    by JWT identity. Must come after @jwt_required().
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorated(*args, **kwargs):
+            try:
+                ticket = pool.acquire(get_jwt_identity())
+            except Overloaded as e:
+                return overloaded_response(e)
+
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                pool.release(ticket)
+        return decorated
+    return wrapper
\ No newline at end of file
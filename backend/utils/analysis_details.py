@@ -0,0 +1,155 @@
+import json
+import os
+
+from sqlalchemy.exc import IntegrityError
+
+from models.cnn_model import summarize_frame_results
+from models.user import db, AnalysisDetail, FrameResults
+
+# Secondary analyses that can be computed after the verdict
+DETAIL_SECTIONS = ('quality', 'faces', 'frames')
+
+
+def parse_include(value, default=DETAIL_SECTIONS):
+    """
+    Parse a comma-separated list of detail sections
+    Returns: List of sections, or default when value is None
+    Raises: ValueError for unknown sections
+    """
+    if value is None:
+        return list(default)
+
+    sections = [s.strip() for s in value.split(',') if s.strip()]
+    unknown = [s for s in sections if s not in DETAIL_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown detail sections: {', '.join(unknown)}. "
+                         f"Must be any of: {', '.join(DETAIL_SECTIONS)}")
+    return sections
+
+
+class DetailAnalyzer:
+    """
+    Secondary analyses of an upload: quality metrics, detected faces and
+    per-frame scores. The analyze routes call the in-memory variants for
+    sections a client asks for up front; everything else is computed from
+    the saved upload the first time it is requested and memoized per
+    analysis id.
+    """
+
+    def __init__(self, image_processor, video_processor, frames_per_video=30):
+        self.image_processor = image_processor
+        self.video_processor = video_processor
+        self.frames_per_video = frames_per_video
+
+    def image_quality(self, img, decode_info):
+        return self.image_processor.analyze_image_quality(
+            img,
+            original_size=(decode_info['width'], decode_info['height'])
+        )
+
+    def image_faces(self, face_boxes, face_analysis=None):
+        """
+        face_analysis: per-face scores when the image was analyzed in
+                       'faces' mode
+        """
+        faces = {'face_count': len(face_boxes), 'boxes': [list(map(int, box)) for box in face_boxes]}
+        if face_analysis is not None:
+            faces.update(face_analysis)
+        return faces
+
+    def video_faces(self, frames, frame_numbers, face_analysis=None, face_index=None):
+        """
+        Faces detected in sampled frames, numbered by position in the video
+        face_analysis: per-face scores when the video was analyzed in
+                       'faces' mode
+        face_index: the faces that analysis scored (from extract_face_batch
+                    with the same frame_numbers); faces are only detected
+                    again when it isn't given
+        """
+        if face_index is None:
+            _, face_index = self.video_processor.extract_face_batch(frames, frame_numbers=frame_numbers)
+        faces = {
+            'face_count': len(face_index),
+            'faces': [
+                {'frame_number': int(face['frame_number']), 'box': list(map(int, face['box']))}
+                for face in face_index
+            ]
+        }
+        if face_analysis is not None:
+            faces.update(face_analysis)
+        return faces
+
+    def compute(self, section, analysis, detector):
+        """
+        Compute one section from the saved upload
+        Returns: Section data (frames: analyze_frames results), or None
+                 when the section doesn't apply to the file type
+        Raises: FileNotFoundError when the upload is gone
+        """
+        if not analysis.file_path or not os.path.exists(analysis.file_path):
+            raise FileNotFoundError(f"Upload for analysis {analysis.id} is no longer available")
+
+        if analysis.file_type == 'image':
+            if section == 'frames':
+                return None
+            img, decode_info = self.image_processor.decode_image(analysis.file_path)
+            if section == 'quality':
+                return self.image_quality(img, decode_info)
+            return self.image_faces(self.image_processor.detect_faces(img))
+
+        if section == 'quality':
+            return self.video_processor.analyze_video_quality(analysis.file_path)
+
+        frames, frame_numbers = self.video_processor.sample_frames(
+            analysis.file_path,
+            max_frames=self.frames_per_video
+        )
+        if section == 'faces':
+            return self.video_faces(frames, frame_numbers)
+
+        processed_frames = self.video_processor.preprocess_frames(frames, normalize=False)
+        return detector.analyze_frames(processed_frames, frame_numbers=frame_numbers)
+
+    def load(self, analysis, sections, detector):
+        """
+        Details of one analysis, computing and storing the sections that
+        haven't been computed yet
+        detector: the analysis's model version, used for per-frame scores of
+                  videos stored without them
+        Returns: Dictionary of section -> data
+        """
+        try:
+            stored = {detail.section: detail for detail in analysis.details}
+            details = {}
+            changed = False
+
+            for section in sections:
+                if section == 'frames':
+                    # Per-frame results live packed in FrameResults
+                    if analysis.frames is None and analysis.file_type == 'video':
+                        frame_analysis = self.compute(section, analysis, detector)
+                        analysis.frames = FrameResults(**FrameResults.encode(frame_analysis['frame_results']))
+                        changed = True
+                    details[section] = (
+                        summarize_frame_results(analysis.frames.to_frame_results())
+                        if analysis.frames is not None else None
+                    )
+                elif section in stored:
+                    details[section] = stored[section].to_data()
+                else:
+                    details[section] = self.compute(section, analysis, detector)
+                    analysis.details.append(AnalysisDetail(section=section, data=json.dumps(details[section])))
+                    changed = True
+
+            if changed:
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    # A concurrent request stored the same section first
+                    db.session.rollback()
+            return details
+
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error loading analysis details: {str(e)}")
@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+
+
+class BufferPool:
+    """
+    Per-thread reusable arrays for batches of frames and model inputs.
+
+    get() hands out a view into an array that is kept between calls on the
+    same thread and only reallocated when a bigger batch is needed, so the
+    steady state allocates nothing per request. A view stays valid until the
+    same thread asks for the same buffer name again, so use one name per
+    purpose and don't keep views past the request.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, name, count, item_shape, dtype=np.uint8):
+        """
+        Get a (count, *item_shape) array of dtype
+        Returns: Uninitialized numpy view
+        """
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+
+        item_shape = tuple(item_shape)
+        dtype = np.dtype(dtype)
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape[0] < count or buffer.shape[1:] != item_shape or buffer.dtype != dtype:
+            buffer = buffers[name] = np.empty((count,) + item_shape, dtype=dtype)
+
+        return buffer[:count]
+
+
+def normalize_uint8(batch, out=None):
+    """
+    Scale a uint8 batch to float32 in [0, 1] in a single pass
+    out: optional float32 array of the same shape to write into
+    Returns: float32 array
+    """
+    if out is None:
+        out = np.empty(batch.shape, dtype=np.float32)
+    np.multiply(batch, np.float32(1.0 / 255.0), out=out, casting='unsafe')
+    return out
+
+
+buffer_pool = BufferPool()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import threading
+
+import cv2
+import numpy as np
+
+_local = threading.local()
+
+
+def get_face_cascade():
+    """
+    Haar cascade for frontal faces, loaded once per thread
+    (CascadeClassifier instances must not be shared between threads)
+    """
+    cascade = getattr(_local, 'face_cascade', None)
+    if cascade is None:
+        cascade = _local.face_cascade = cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+    return cascade
+
+
+def detect_faces(gray):
+    """
+    Detect faces in a grayscale image
+    Returns: List of (x, y, w, h) tuples
+    """
+    faces = get_face_cascade().detectMultiScale(
+        gray,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(30, 30)
+    )
+    return [tuple(int(v) for v in face) for face in faces]
+
+
+def crop_faces(image, boxes, target_size, out=None, color_conversion=None):
+    """
+    Crop and resize faces into a uint8 batch
+    image: source image (any channel order)
+    boxes: list of (x, y, w, h)
+    out: optional uint8 array with room for len(boxes) crops
+    color_conversion: optional cv2 color code applied to each crop in place
+    Returns: uint8 array of shape (len(boxes), height, width, 3)
+    """
+    width, height = target_size
+    if out is None:
+        out = np.empty((len(boxes), height, width, 3), dtype=np.uint8)
+
+    for i, (x, y, w, h) in enumerate(boxes):
+        slot = out[i]
+        cv2.resize(image[y:y+h, x:x+w], target_size, dst=slot)
+        if color_conversion is not None:
+            cv2.cvtColor(slot, color_conversion, dst=slot)
+
+    return out[:len(boxes)]
\ No newline at end of file
@@ -1,7 +1,12 @@
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 from config import Config
 
+# Background writer for uploads that are analyzed from memory
+_upload_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix='upload-writer')
+
 def allowed_file(filename, file_type='image'):
     """
     Check if file extension is allowed
@@ -40,36 +45,75 @@ def get_file_type(filename):
     else:
         return None
 
-def save_upload_file(file, upload_folder):
+def reserve_upload_path(filename, upload_folder):
     """
-    Save uploaded file securely
-    Returns: (saved_path, filename)
+    Claim a unique file name in the upload folder by creating it empty
+    Returns: (file_path, final_filename)
     """
-    try:
-        # Create upload folder if it doesn't exist
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Secure the filename
-        filename = secure_filename(file.filename)
-        
-        # Generate unique filename if file already exists
-        base_name, ext = os.path.splitext(filename)
-        counter = 1
-        final_filename = filename
-        
-        while os.path.exists(os.path.join(upload_folder, final_filename)):
+    # Create upload folder if it doesn't exist
+    os.makedirs(upload_folder, exist_ok=True)
+    
+    # Secure the filename
+    filename = secure_filename(filename)
+    
+    # Generate unique filename if file already exists. O_EXCL makes the
+    # claim atomic, so concurrent uploads never pick the same name.
+    base_name, ext = os.path.splitext(filename)
+    counter = 1
+    final_filename = filename
+    
+    while True:
+        file_path = os.path.join(upload_folder, final_filename)
+        try:
+            os.close(os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+            return file_path, final_filename
+        except FileExistsError:
             final_filename = f"{base_name}_{counter}{ext}"
             counter += 1
+
+def save_upload_file(file, upload_folder):
+    """
+    Save uploaded file securely, hashing the contents as they are written
+    Returns: (saved_path, filename, SHA-256 hex digest of the contents)
+    """
+    try:
+        file_path, final_filename = reserve_upload_path(file.filename, upload_folder)
         
         # Save file
-        file_path = os.path.join(upload_folder, final_filename)
-        file.save(file_path)
+        sha = hashlib.sha256()
+        with open(file_path, 'wb') as f:
+            for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+                sha.update(chunk)
+                f.write(chunk)
         
-        return file_path, final_filename
+        return file_path, final_filename, sha.hexdigest()
         
     except Exception as e:
         raise Exception(f"Error saving file: {str(e)}")
 
+def read_upload_bytes(file, max_bytes):
+    """
+    Read an uploaded file into memory if it is at most max_bytes
+    Returns: bytes, or None (with the stream rewound) if it is larger
+    """
+    data = file.stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        file.stream.seek(0)
+        return None
+    return data
+
+def _write_bytes(data, file_path):
+    with open(file_path, 'wb') as f:
+        f.write(data)
+    return file_path
+
+def save_bytes_async(data, file_path):
+    """
+    Write bytes to file_path on a background thread
+    Returns: Future that resolves to file_path
+    """
+    return _upload_writer.submit(_write_bytes, data, file_path)
+
 def delete_file(file_path):
     """Delete file if it exists"""
     try:
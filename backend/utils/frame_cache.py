@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.metrics import CACHE_REQUESTS
+
+class FrameCache:
+    """
+    On-disk cache of sampled, resized frames stored as .npy files.
+
+    Entries are keyed by a SHA-256 of the video's contents plus the
+    sampling parameters, and read back with np.load(mmap_mode='r'), so a re-analysis
+    maps the frames zero-copy instead of decoding the video again. The
+    directory is kept under max_bytes by evicting least recently used
+    entries (hits refresh an entry's mtime). The source frame numbers of
+    each entry are kept in a small .idx sidecar next to the frames.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (path, size, mtime_ns) -> digest, so a stored file is hashed once
+        self._digests = OrderedDict()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def content_hash(self, file_path):
+        """
+        SHA-256 of the file contents, memoized by path, size and mtime.
+        Uploads are hashed while they are saved and pass that digest in
+        instead; this is for files read back later.
+        Returns: Hex digest
+        """
+        stat = os.stat(file_path)
+        stamp = (file_path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(stamp)
+            if digest is not None:
+                self._digests.move_to_end(stamp)
+                return digest
+
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._digests[stamp] = digest
+            while len(self._digests) > 256:
+                self._digests.popitem(last=False)
+        return digest
+
+    def make_key(self, content_hash, **params):
+        """Combine a content hash with sampling parameters into a cache key"""
+        encoded = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(f"{content_hash}:{encoded}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _index_path(self, path):
+        return f"{path[:-len('.npy')]}.idx"
+
+    def get(self, key):
+        """
+        Look up frames by key
+        Returns: (read-only memory-mapped frames, list of source frame
+                  numbers), or None on a miss
+        """
+        path = self._path(key)
+        try:
+            frames = np.load(path, mmap_mode='r')
+            with open(self._index_path(path), 'rb') as f:
+                frame_numbers = np.load(f).tolist()
+        except (FileNotFoundError, ValueError, OSError):
+            CACHE_REQUESTS.inc('frames', 'miss')
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        CACHE_REQUESTS.inc('frames', 'hit')
+        return frames, frame_numbers
+
+    def put(self, key, frames, frame_numbers):
+        """
+        Store frames and their source frame numbers under key, then evict
+        old entries if over budget
+        """
+        path = self._path(key)
+        index_path = self._index_path(path)
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        try:
+            # Sidecar first, so a visible .npy always has its index
+            with open(index_path + suffix, 'wb') as f:
+                np.save(f, np.asarray(frame_numbers, dtype=np.int64))
+            os.replace(index_path + suffix, index_path)
+            with open(path + suffix, 'wb') as f:
+                np.save(f, np.ascontiguousarray(frames))
+            os.replace(path + suffix, path)
+        except Exception as e:
+            print(f"Error caching frames: {str(e)}")
+            for tmp_path in (path + suffix, index_path + suffix):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until under max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.npy'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Already gone, or still mapped on a platform that forbids it
+                continue
+            try:
+                os.remove(self._index_path(path))
+            except OSError:
+                pass
+            if total <= self.max_bytes:
+                break
\ No newline at end of file
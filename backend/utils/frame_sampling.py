@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+# Probe frames are compared as small grayscale thumbnails
+THUMBNAIL_SIZE = (32, 32)
+HISTOGRAM_BINS = 32
+
+
+def frame_signature(frame):
+    """
+    Cheap per-frame signature used for shot cuts and duplicate checks
+    frame: RGB uint8 frame at any resolution
+    Returns: (float32 32x32 grayscale thumbnail, normalized histogram)
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+    thumbnail = cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    histogram = cv2.calcHist([thumbnail], [0], None, [HISTOGRAM_BINS], [0, 256])
+    cv2.normalize(histogram, histogram, alpha=1.0, norm_type=cv2.NORM_L1)
+    return thumbnail.astype(np.float32), histogram
+
+
+def split_shots(signatures, cut_threshold):
+    """
+    Split probe frames into shots wherever consecutive probes differ by
+    more than cut_threshold, measured as the larger of the histogram
+    Bhattacharyya distance and the mean absolute thumbnail difference
+    (scaled to [0, 1])
+    Returns: List of (start, end) probe index ranges, end exclusive
+    """
+    shots = []
+    start = 0
+    for i in range(1, len(signatures)):
+        prev_thumb, prev_hist = signatures[i - 1]
+        thumb, hist = signatures[i]
+        distance = max(
+            cv2.compareHist(prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA),
+            float(np.mean(np.abs(thumb - prev_thumb))) / 255.0
+        )
+        if distance > cut_threshold:
+            shots.append((start, i))
+            start = i
+    if signatures:
+        shots.append((start, len(signatures)))
+    return shots
+
+
+def allocate_budget(shot_lengths, budget):
+    """
+    Split a frame budget across shots in proportion to their length,
+    giving every shot at least one frame while the budget allows it
+    (longest shots first) and handing out the remainder by largest
+    fractional share
+    Returns: List of per-shot frame counts
+    """
+    counts = [0] * len(shot_lengths)
+    if budget <= 0 or not shot_lengths:
+        return counts
+
+    by_length = sorted(range(len(shot_lengths)), key=lambda i: -shot_lengths[i])
+    for i in by_length[:budget]:
+        counts[i] = 1
+
+    remaining = budget - sum(counts)
+    capacity = [length - count for length, count in zip(shot_lengths, counts)]
+    total_capacity = sum(capacity)
+    if remaining <= 0 or total_capacity <= 0:
+        return counts
+
+    remaining = min(remaining, total_capacity)
+    shares = [remaining * c / total_capacity for c in capacity]
+    for i, share in enumerate(shares):
+        counts[i] += int(share)
+    leftover = remaining - sum(int(s) for s in shares)
+    by_fraction = sorted(range(len(shares)), key=lambda i: -(shares[i] - int(shares[i])))
+    for i in by_fraction:
+        if leftover <= 0:
+            break
+        if counts[i] < shot_lengths[i]:
+            counts[i] += 1
+            leftover -= 1
+    return counts
+
+
+def select_frames(signatures, shots, counts, duplicate_threshold):
+    """
+    Pick up to counts[i] evenly spaced probes from each shot, skipping any
+    probe whose thumbnail is within duplicate_threshold (mean absolute
+    difference, 0-255 scale) of a frame already picked anywhere in the
+    video
+    Returns: Sorted list of selected probe indices
+    """
+    selected = []
+    kept_thumbnails = []
+
+    for (start, end), count in zip(shots, counts):
+        if count <= 0:
+            continue
+
+        # Evenly spaced positions first, then the rest of the shot as
+        # fallbacks for positions rejected as duplicates
+        preferred = np.linspace(start, end - 1, count + 2, dtype=int)[1:-1].tolist() if count < end - start \
+            else list(range(start, end))
+        candidates = list(dict.fromkeys(preferred + list(range(start, end))))
+
+        picked = 0
+        for probe in candidates:
+            if picked >= count:
+                break
+            thumb = signatures[probe][0]
+            if any(float(np.mean(np.abs(thumb - kept))) <= duplicate_threshold for kept in kept_thumbnails):
+                continue
+            selected.append(probe)
+            kept_thumbnails.append(thumb)
+            picked += 1
+
+    return sorted(selected)
\ No newline at end of file
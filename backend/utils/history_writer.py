@@ -0,0 +1,281 @@
+import atexit
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models.user import db, User, SearchHistory, FrameResults, AnalysisDetail, IdSequence, ChangeCounter
+from utils.metrics import HISTORY_FLUSH_ROWS, HISTORY_DROPPED
+
+
+class HistoryWriter:
+    """
+    Write-behind recorder for SearchHistory rows. Request threads queue
+    their rows and get the analysis id back at once; a background thread
+    inserts everything queued in one transaction per flush (group commit),
+    at most flush_interval seconds after the first row of a batch arrived.
+
+    Ids are reserved from the id_sequences table in blocks of id_block_size,
+    so every worker process can hand them out without touching the database
+    on each request. Ids are unique but not ordered across processes.
+
+    Rows whose user was deleted while they were queued are skipped, and
+    rows that can't be written are dropped; either way their ids are kept
+    for a while (max_dropped) so the owner gets 410 instead of 404.
+    """
+
+    max_dropped = 10000
+
+    def __init__(self):
+        self.enabled = False
+        self._engine = None
+        self._thread = None
+        self._cond = threading.Condition()
+        self._id_lock = threading.Lock()
+        self._next_id = 0
+        self._block_end = 0
+        self._pending = []
+        self._enqueued = 0
+        # Change counter scope -> sequence number of its latest queued row
+        self._last_queued = {}
+        # Analysis id -> (user id, reason) of rows that were never written
+        self._dropped = OrderedDict()
+        self._written = 0
+        self._flush_requested = False
+        self._closing = False
+        atexit.register(self.close)
+
+    def init_app(self, app):
+        """
+        Configure from the app config and start the writer thread. Must be
+        called after the tables exist.
+        """
+        self.close()
+        self.enabled = app.config['HISTORY_WRITE_BEHIND_ENABLED']
+        self.flush_interval = app.config['HISTORY_FLUSH_INTERVAL_MS'] / 1000
+        self.max_batch = app.config['HISTORY_FLUSH_MAX_ROWS']
+        self.id_block_size = app.config['HISTORY_ID_BLOCK_SIZE']
+        with app.app_context():
+            self._engine = db.engine
+
+        self._next_id = self._block_end = 0
+        self._closing = False
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+
+    def _reserve_block(self):
+        """
+        Take the next block of ids for this process
+        Returns: (first id, end id exclusive)
+        """
+        sequences = IdSequence.__table__
+        for attempt in range(3):
+            try:
+                with self._engine.begin() as conn:
+                    # The UPDATE takes SQLite's write lock, so the read below
+                    # sees our own increment and no other process's
+                    result = conn.execute(
+                        update(sequences)
+                        .where(sequences.c.name == SearchHistory.__tablename__)
+                        .values(next_id=sequences.c.next_id + self.id_block_size)
+                    )
+                    if result.rowcount == 0:
+                        start = (conn.execute(select(func.max(SearchHistory.id))).scalar() or 0) + 1
+                        conn.execute(sequences.insert().values(
+                            name=SearchHistory.__tablename__,
+                            next_id=start + self.id_block_size
+                        ))
+                    end = conn.execute(
+                        select(sequences.c.next_id).where(sequences.c.name == SearchHistory.__tablename__)
+                    ).scalar()
+                return end - self.id_block_size, end
+            except IntegrityError:
+                # Another process created the sequence first; use it
+                if attempt == 2:
+                    raise
+
+    def _allocate_id(self):
+        with self._id_lock:
+            if self._next_id >= self._block_end:
+                self._next_id, self._block_end = self._reserve_block()
+            analysis_id = self._next_id
+            self._next_id += 1
+            return analysis_id
+
+    def record(self, frame_results=None, details=None, **fields):
+        """
+        Record one analysis
+        frame_results: optional per-frame results of a video analysis,
+                       stored packed in FrameResults
+        details: optional secondary analyses computed with the request,
+                 section -> data, stored as AnalysisDetail rows
+        fields: SearchHistory column values
+        Returns: The analysis id
+        Raises: LookupError when the user was deleted (write-behind off;
+                otherwise the row is dropped when it is written)
+        """
+        frames = FrameResults.encode(frame_results) if frame_results else None
+        detail_rows = [
+            {'section': section, 'data': json.dumps(data), 'created_at': datetime.utcnow()}
+            for section, data in (details or {}).items()
+        ]
+
+        scopes = [ChangeCounter.user_scope(fields['user_id']), ChangeCounter.GLOBAL]
+        if not self.enabled:
+            # Same ids as write-behind processes, which may share the database
+            search_record = SearchHistory(id=self._allocate_id(), **fields)
+            if frames is not None:
+                search_record.frames = FrameResults(**frames)
+            search_record.details = [AnalysisDetail(**detail) for detail in detail_rows]
+            # Bump first for the write lock, as in _insert
+            ChangeCounter.bump(db.session, scopes)
+            if db.session.query(User.id).filter_by(id=fields['user_id']).first() is None:
+                db.session.rollback()
+                raise LookupError(f"User {fields['user_id']} no longer exists")
+            db.session.add(search_record)
+            db.session.commit()
+            return search_record.id
+
+        row = dict(fields, id=self._allocate_id(), timestamp=datetime.utcnow())
+        if frames is not None:
+            frames['analysis_id'] = row['id']
+        for detail in detail_rows:
+            detail['analysis_id'] = row['id']
+        with self._cond:
+            self._pending.append((row, frames, detail_rows))
+            self._enqueued += 1
+            for scope in scopes:
+                self._last_queued[scope] = self._enqueued
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        return row['id']
+
+    def flush(self, scopes=None):
+        """
+        Block until every row recorded so far is written. Call before
+        reading or deleting history so a user sees their own analyses.
+        scopes: only wait for rows that bump these change counter scopes
+                (rows are written in order, so up to the latest of them)
+        """
+        if not self.enabled:
+            return
+        with self._cond:
+            if scopes is None:
+                target = self._enqueued
+            else:
+                target = max((self._last_queued.get(scope, 0) for scope in scopes), default=0)
+            if self._written >= target:
+                return
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._written >= target or self._thread is None)
+
+    def dropped_reason(self, analysis_id, user_id):
+        """
+        Returns: Why an analysis of this user was never written, or None
+        """
+        with self._cond:
+            dropped = self._dropped.get(analysis_id)
+        if dropped is None or dropped[0] != user_id:
+            return None
+        return dropped[1]
+
+    def _drop(self, entry, reason):
+        HISTORY_DROPPED.inc()
+        print(f"Dropped history row {entry[0]['id']}: {reason}")
+        with self._cond:
+            self._dropped[entry[0]['id']] = (entry[0]['user_id'], reason)
+            while len(self._dropped) > self.max_dropped:
+                self._dropped.popitem(last=False)
+
+    def close(self):
+        """Write out queued rows and stop the writer thread"""
+        thread = self._thread
+        if thread is None:
+            return
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        thread.join()
+        with self._cond:
+            self._thread = None
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                # Give other requests until the interval is up to join the batch
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.max_batch or self._flush_requested or self._closing,
+                    timeout=self.flush_interval
+                )
+                entries = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._flush_requested = bool(self._pending) and self._flush_requested
+                if not entries and self._closing:
+                    return
+
+            if entries:
+                self._write(entries)
+
+            with self._cond:
+                self._written += len(entries)
+                self._cond.notify_all()
+
+    def _insert(self, entries):
+        """
+        Insert (history row, frame row, detail rows) entries in one
+        transaction, skipping those of users deleted since they were queued
+        (SQLite doesn't enforce the foreign key)
+        Returns: The skipped entries
+        """
+        with self._engine.begin() as conn:
+            # Bumping first takes the write lock, so no user can be deleted
+            # between the check below and the inserts
+            ChangeCounter.bump(
+                conn,
+                [ChangeCounter.user_scope(row['user_id']) for row, _, _ in entries] + [ChangeCounter.GLOBAL]
+            )
+            user_ids = {row['user_id'] for row, _, _ in entries}
+            existing = set(conn.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+            orphaned = [entry for entry in entries if entry[0]['user_id'] not in existing]
+            entries = [entry for entry in entries if entry[0]['user_id'] in existing]
+            if not entries:
+                return orphaned
+
+            frame_rows = [frames for _, frames, _ in entries if frames is not None]
+            detail_rows = [detail for _, _, details in entries for detail in details]
+            conn.execute(SearchHistory.__table__.insert(), [row for row, _, _ in entries])
+            if frame_rows:
+                conn.execute(FrameResults.__table__.insert(), frame_rows)
+            if detail_rows:
+                conn.execute(AnalysisDetail.__table__.insert(), detail_rows)
+        return orphaned
+
+    def _write(self, entries):
+        try:
+            orphaned = self._insert(entries)
+            HISTORY_FLUSH_ROWS.observe(value=len(entries) - len(orphaned))
+            for entry in orphaned:
+                self._drop(entry, 'the user was deleted')
+            return
+        except Exception as e:
+            print(f"Error writing {len(entries)} history rows, retrying one by one: {str(e)}")
+
+        # One bad row shouldn't lose the batch
+        for entry in entries:
+            try:
+                if self._insert([entry]):
+                    self._drop(entry, 'the user was deleted')
+                else:
+                    HISTORY_FLUSH_ROWS.observe(value=1)
+            except Exception as e:
+                self._drop(entry, str(e))
+
+
+history_writer = HistoryWriter()
@@ -1,102 +1,240 @@
 import cv2
 import numpy as np
 from PIL import Image
+import io
 import os
+from utils.buffers import normalize_uint8
+from utils.face_detection import detect_faces, crop_faces
+
+# Formats whose decoder can skip DCT coefficients to decode at 1/2, 1/4, 1/8
+REDUCIBLE_FORMATS = {'JPEG', 'MPO'}
+REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+# EXIF orientations that rotate the image by 90 degrees
+EXIF_ORIENTATION_TAG = 0x0112
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
 
 class ImageProcessor:
     """
     Handles image preprocessing for deepfake detection
     """
     
-    def __init__(self, target_size=(224, 224)):
+    def __init__(self, target_size=(224, 224), decode_min_side=None, blur_reference_side=720):
+        """
+        decode_min_side: smallest short side (in pixels) every stage that
+                         uses the decoded image can work with. When set,
+                         large JPEGs are decoded at reduced resolution as
+                         long as they stay above it. None always decodes
+                         at full resolution.
+        blur_reference_side: short side (in pixels) larger images are
+                             resized to before measuring blur, so the score
+                             doesn't depend on the decode scale
+        """
         self.target_size = target_size
+        self.decode_min_side = decode_min_side
+        self.blur_reference_side = blur_reference_side
     
-    def load_image(self, image_path):
-        """Load image from file path"""
+    def read_image_header(self, image_path):
+        """
+        Read format and dimensions without decoding pixel data
+        image_path: file path or encoded image bytes
+        Returns: Dictionary with format, width and height (after EXIF rotation)
+        """
+        try:
+            if isinstance(image_path, (bytes, bytearray, memoryview)):
+                image_path = io.BytesIO(image_path)
+            
+            with Image.open(image_path) as header:
+                width, height = header.size
+                image_format = header.format
+                orientation = header.getexif().get(EXIF_ORIENTATION_TAG, 1)
+            
+            # OpenCV applies EXIF orientation while decoding
+            if orientation in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+            
+            return {'format': image_format, 'width': int(width), 'height': int(height)}
+            
+        except Exception as e:
+            raise Exception(f"Error reading image header: {str(e)}")
+    
+    def plan_decode(self, header, min_side=None):
+        """
+        Pick the largest JPEG reduction factor that keeps the short side
+        at or above min_side
+        Returns: 1 (full decode), 2, 4 or 8
+        """
+        if not min_side or header['format'] not in REDUCIBLE_FORMATS:
+            return 1
+        
+        short_side = min(header['width'], header['height'])
+        for factor in (8, 4, 2):
+            if short_side // factor >= min_side:
+                return factor
+        return 1
+    
+    def decode_image(self, image_path, min_side=None):
+        """
+        Decode an image, at reduced resolution when the plan allows it
+        image_path: file path, or the encoded bytes of an upload to decode
+                    straight from memory
+        min_side: overrides decode_min_side for this call
+        Returns: (BGR array, info dict with original width/height, format
+                 and the scale factor used)
+        """
         try:
-            img = cv2.imread(image_path)
-            if img is None:
-                raise ValueError(f"Could not load image from {image_path}")
-            return img
+            min_side = min_side or self.decode_min_side
+            header = None
+            scale = 1
+            
+            if min_side:
+                try:
+                    header = self.read_image_header(image_path)
+                    scale = self.plan_decode(header, min_side)
+                except Exception:
+                    # Unreadable header - let the full decoder have a go
+                    header = None
+            
+            flags = REDUCED_DECODE_FLAGS[scale] if scale > 1 else cv2.IMREAD_COLOR
+            if isinstance(image_path, (bytes, bytearray, memoryview)):
+                img = cv2.imdecode(np.frombuffer(image_path, dtype=np.uint8), flags)
+                if img is None:
+                    raise ValueError("Could not decode image data")
+            else:
+                img = cv2.imread(image_path, flags)
+                if img is None:
+                    raise ValueError(f"Could not load image from {image_path}")
+            
+            if header is None:
+                height, width = img.shape[:2]
+                header = {'format': None, 'width': int(width), 'height': int(height)}
+            
+            return img, dict(header, scale=scale)
+            
         except Exception as e:
             raise Exception(f"Error loading image: {str(e)}")
     
-    def preprocess_image(self, image_path):
+    def load_image(self, image_path):
+        """Load image from file path"""
+        img, _ = self.decode_image(image_path)
+        return img
+    
+    def _as_image(self, image):
+        """Accept either a file path or an already decoded BGR array"""
+        if isinstance(image, np.ndarray):
+            return image
+        return self.load_image(image)
+    
+    def preprocess_image(self, image, normalize=True, out=None):
         """
         Preprocess image for CNN model
-        Returns: Normalized numpy array
+        image: file path or decoded BGR array
+        normalize: scale to float32 [0, 1]; pass False to keep uint8 and
+                   leave normalization to the model boundary
+        out: optional uint8 array of shape (1, height, width, 3) to write into
+        Returns: Batch of one RGB image
         """
         try:
             # Load image
-            img = self.load_image(image_path)
+            img = self._as_image(image)
             
-            # Convert BGR to RGB
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            if out is None:
+                out = np.empty((1, self.target_size[1], self.target_size[0], 3), dtype=np.uint8)
             
-            # Resize to target size
-            img = cv2.resize(img, self.target_size)
+            # Resize straight into the batch slot, then swap BGR to RGB in
+            # place - cheaper than converting the full-resolution image
+            cv2.resize(img, self.target_size, dst=out[0])
+            cv2.cvtColor(out[0], cv2.COLOR_BGR2RGB, dst=out[0])
             
             # Normalize pixel values to [0, 1]
-            img = img.astype(np.float32) / 255.0
+            if normalize:
+                return normalize_uint8(out)
             
-            # Add batch dimension
-            img = np.expand_dims(img, axis=0)
-            
-            return img
+            return out
             
         except Exception as e:
             raise Exception(f"Error preprocessing image: {str(e)}")
     
-    def extract_faces(self, image_path):
+    def detect_faces(self, image):
         """
-        Extract faces from image using Haar Cascade
-        Returns: List of face images
+        Detect faces using Haar Cascade
+        image: file path or decoded BGR array
+        Returns: List of (x, y, w, h) boxes
         """
         try:
-            img = self.load_image(image_path)
+            img = self._as_image(image)
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            return detect_faces(gray)
             
-            # Load Haar Cascade for face detection
-            face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            
-            # Detect faces
-            faces = face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
-            
-            face_images = []
-            for (x, y, w, h) in faces:
-                face = img[y:y+h, x:x+w]
-                face = cv2.resize(face, self.target_size)
-                face_images.append(face)
-            
-            return face_images
+        except Exception as e:
+            raise Exception(f"Error detecting faces: {str(e)}")
+    
+    def extract_faces(self, image):
+        """
+        Extract faces from image using Haar Cascade
+        image: file path or decoded BGR array
+        Returns: List of face images
+        """
+        try:
+            img = self._as_image(image)
+            boxes = self.detect_faces(img)
+            return list(crop_faces(img, boxes, self.target_size))
             
         except Exception as e:
             raise Exception(f"Error extracting faces: {str(e)}")
     
-    def analyze_image_quality(self, image_path):
+    def extract_face_batch(self, image, boxes=None, out=None):
+        """
+        Crop every detected face into one RGB batch for the model
+        boxes: face boxes from detect_faces (detected here if omitted)
+        out: optional uint8 array with room for all crops
+        Returns: (uint8 batch of shape (faces, height, width, 3), boxes)
+        """
+        try:
+            img = self._as_image(image)
+            if boxes is None:
+                boxes = self.detect_faces(img)
+            batch = crop_faces(img, boxes, self.target_size, out=out, color_conversion=cv2.COLOR_BGR2RGB)
+            return batch, boxes
+            
+        except Exception as e:
+            raise Exception(f"Error extracting face batch: {str(e)}")
+    
+    def analyze_image_quality(self, image, original_size=None):
         """
         Analyze image quality metrics
+        image: file path or decoded BGR array
+        original_size: (width, height) of the source when image was decoded
+                       at reduced resolution; brightness is measured on the
+                       decoded pixels
         Returns: Dictionary with quality metrics
         """
         try:
-            img = self.load_image(image_path)
-            
-            # Calculate blur (Laplacian variance)
+            img = self._as_image(image)
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
             
             # Calculate brightness
             brightness = np.mean(gray)
             
+            # Calculate blur (Laplacian variance). Laplacian variance changes
+            # with scale, so it is measured at the reference resolution
+            # whatever the decode factor was
+            height, width = gray.shape
+            short_side = min(width, height)
+            if self.blur_reference_side and short_side > self.blur_reference_side:
+                ratio = self.blur_reference_side / short_side
+                size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+                gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+            blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
+            
             # Get image dimensions
-            height, width = img.shape[:2]
+            if original_size:
+                width, height = original_size
+            else:
+                height, width = img.shape[:2]
             
             return {
                 'blur_score': float(blur_score),  # Convert to Python float
@@ -0,0 +1,42 @@
+import time
+
+from flask import current_app, url_for
+from itsdangerous import BadSignature, URLSafeSerializer
+
+# Files that can be linked: the original upload and its renditions
+MEDIA_KINDS = ('media', 'thumbnail', 'poster')
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='media-url')
+
+
+def sign_media_url(analysis_id, kind):
+    """
+    Signed URL granting access to one file of one analysis until it
+    expires. Expiry is rounded up to the next MEDIA_URL_TTL_SECONDS
+    boundary, so a link stays the same (and browser-cacheable) within a
+    window and is valid for at least one TTL.
+    Returns: (absolute URL, expiry as a Unix timestamp)
+    """
+    ttl = current_app.config['MEDIA_URL_TTL_SECONDS']
+    expires = (int(time.time()) // ttl + 2) * ttl
+    token = _serializer().dumps([analysis_id, kind, expires])
+    if kind == 'media':
+        url = url_for('detection.get_analysis_media', analysis_id=analysis_id, token=token, _external=True)
+    else:
+        url = url_for('detection.get_analysis_thumbnail', analysis_id=analysis_id, kind=kind,
+                      token=token, _external=True)
+    return url, expires
+
+
+def verify_media_token(token, analysis_id, kind):
+    """
+    Returns: True if the token was signed for this analysis and kind and
+             hasn't expired
+    """
+    try:
+        signed_id, signed_kind, expires = _serializer().loads(token or '')
+    except (BadSignature, ValueError, TypeError):
+        return False
+    return signed_id == analysis_id and signed_kind == kind and expires >= time.time()
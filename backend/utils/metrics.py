@@ -0,0 +1,254 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, spanning cache hits to long video analyses
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """
+    Base class for labelled metrics. Values are kept per label tuple.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        return tuple(str(v) for v in labels)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}'
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{_format_labels(self.label_names, key)} {value}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, *labels, value):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    @contextmanager
+    def track(self, *labels):
+        """Count the wrapped block as in progress"""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, value):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., +Inf count, sum]
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - start)
+
+    def _render_value(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state):
+            cumulative += count
+            le = _format_labels(self.label_names, key, f'le="{bound}"')
+            lines.append(f'{self.name}_bucket{le} {cumulative}')
+        cumulative += state[len(self.buckets)]
+        le = _format_labels(self.label_names, key, 'le="+Inf"')
+        lines.append(f'{self.name}_bucket{le} {cumulative}')
+        labels = _format_labels(self.label_names, key)
+        lines.append(f'{self.name}_sum{labels} {state[-1]}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics collection rendered in the Prometheus text
+    exposition format. Each worker process keeps its own registry, so
+    scrape every worker (or run a single worker) for complete numbers.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+REQUEST_LATENCY = metrics.histogram(
+    'deepfake_request_duration_seconds',
+    'End-to-end HTTP request latency',
+    labels=('endpoint', 'method', 'status')
+)
+STAGE_LATENCY = metrics.histogram(
+    'deepfake_stage_duration_seconds',
+    'Latency of individual analysis pipeline stages',
+    labels=('route', 'stage')
+)
+RESULTS = metrics.counter(
+    'deepfake_results_total',
+    'Completed analyses by file type and verdict',
+    labels=('file_type', 'prediction')
+)
+CACHE_REQUESTS = metrics.counter(
+    'deepfake_cache_requests_total',
+    'Cache lookups by cache and outcome (hit or miss)',
+    labels=('cache', 'result')
+)
+ERRORS = metrics.counter(
+    'deepfake_errors_total',
+    'Failed analyses by route and the stage that failed',
+    labels=('route', 'stage')
+)
+CASCADE_DECISIONS = metrics.counter(
+    'deepfake_cascade_decisions_total',
+    'Cascade verdicts by the stage that produced them (screener or heavy)',
+    labels=('file_type', 'stage')
+)
+QUEUE_DEPTH = metrics.gauge(
+    'deepfake_queue_depth',
+    'Analyses currently admitted and not yet finished',
+    labels=('route',)
+)
+ADMISSION_ACTIVE = metrics.gauge(
+    'deepfake_admission_active',
+    'Analyses holding a slot in each admission pool',
+    labels=('pool',)
+)
+ADMISSION_QUEUED = metrics.gauge(
+    'deepfake_admission_queued',
+    'Analyses waiting for a slot in each admission pool',
+    labels=('pool',)
+)
+ADMISSION_REJECTED = metrics.counter(
+    'deepfake_admission_rejected_total',
+    'Analyses turned away by admission control (queue_full or timeout)',
+    labels=('pool', 'reason')
+)
+ADMISSION_WAIT = metrics.histogram(
+    'deepfake_admission_wait_seconds',
+    'Time spent queued before admission',
+    labels=('pool',)
+)
+RATE_LIMITED = metrics.counter(
+    'deepfake_rate_limited_total',
+    'Requests rejected by per-user rate limits',
+    labels=('endpoint_class',)
+)
+HISTORY_FLUSH_ROWS = metrics.histogram(
+    'deepfake_history_flush_rows',
+    'Search history rows written per write-behind transaction',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+HISTORY_DROPPED = metrics.counter(
+    'deepfake_history_dropped_total',
+    'Search history rows the write-behind recorder failed to write'
+)
+
+
+@contextmanager
+def time_stage(route, stage):
+    """
+    Time one pipeline stage and count it as the failing stage if it raises
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(route, stage)
+        raise
+    finally:
+        STAGE_LATENCY.observe(route, stage, value=time.perf_counter() - start)
\ No newline at end of file
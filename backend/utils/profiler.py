@@ -0,0 +1,193 @@
+import cProfile
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from utils.user_cache import user_cache
+
+PROFILE_MODES = ('sample', 'cprofile')
+PROFILE_EXTENSIONS = ('.collapsed', '.pstats')
+
+
+def _collapse(frame):
+    """Turn a frame into a 'root;...;leaf' collapsed stack string"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Periodically samples the Python stacks of running threads and counts
+    them as collapsed stacks, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval=0.001, thread_ids=None, max_stacks=20000):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.max_stacks = max_stacks
+        self.samples = 0
+
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                stacks.append(_collapse(frame))
+
+            with self._lock:
+                self.samples += 1
+                for stack in stacks:
+                    # Once full, only count stacks that were already seen
+                    if stack in self._counts or len(self._counts) < self.max_stacks:
+                        self._counts[stack] += 1
+
+    def collapsed(self):
+        """Collapsed stack lines, one 'stack count' per line"""
+        with self._lock:
+            items = sorted(self._counts.items())
+        return ''.join(f"{stack} {count}\n" for stack, count in items)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self.samples = 0
+
+
+def _prune_profiles(profile_folder, max_files):
+    names = [n for n in os.listdir(profile_folder) if n.endswith(PROFILE_EXTENSIONS)]
+    if len(names) <= max_files:
+        return
+    names.sort(key=lambda n: os.path.getmtime(os.path.join(profile_folder, n)))
+    for name in names[:len(names) - max_files]:
+        try:
+            os.remove(os.path.join(profile_folder, name))
+        except OSError:
+            pass
+
+
+def list_profiles(profile_folder):
+    """
+    List stored profiles
+    Returns: List of dictionaries, newest first
+    """
+    if not os.path.isdir(profile_folder):
+        return []
+
+    profiles = []
+    for name in os.listdir(profile_folder):
+        if not name.endswith(PROFILE_EXTENSIONS):
+            continue
+        path = os.path.join(profile_folder, name)
+        stat = os.stat(path)
+        profiles.append({
+            'name': name,
+            'format': 'pstats' if name.endswith('.pstats') else 'collapsed',
+            'size_bytes': stat.st_size,
+            'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+        })
+
+    profiles.sort(key=lambda p: p['created_at'], reverse=True)
+    return profiles
+
+
+def requested_profile_mode():
+    """
+    Read the profiling mode from the X-Profile header or ?profile= flag
+    Returns: 'sample', 'cprofile' or None
+    """
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if not mode:
+        return None
+    mode = mode.strip().lower()
+    if mode in ('1', 'true', 'yes'):
+        return 'sample'
+    return mode if mode in PROFILE_MODES else None
+
+
+def profiled(route):
+    """
+    Decorator that runs the request under a profiler when an admin asks
+    for it. Must be applied below @jwt_required(). The stored profile's
+    file name is returned in the X-Profile-Id response header.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            mode = requested_profile_mode()
+            if mode is None or user_cache.role(get_jwt_identity()) != 'admin':
+                return fn(*args, **kwargs)
+
+            profile_folder = current_app.config['PROFILE_FOLDER']
+            os.makedirs(profile_folder, exist_ok=True)
+            name = f"{datetime.utcnow():%Y%m%d-%H%M%S}-{route}-{uuid.uuid4().hex[:8]}"
+
+            if mode == 'cprofile':
+                profiler = cProfile.Profile()
+                result = profiler.runcall(fn, *args, **kwargs)
+                name += '.pstats'
+                profiler.dump_stats(os.path.join(profile_folder, name))
+            else:
+                sampler = StackSampler(
+                    interval=current_app.config['PROFILER_SAMPLE_INTERVAL'],
+                    thread_ids=[threading.get_ident()]
+                ).start()
+                try:
+                    result = fn(*args, **kwargs)
+                finally:
+                    sampler.stop()
+                name += '.collapsed'
+                with open(os.path.join(profile_folder, name), 'w') as f:
+                    f.write(sampler.collapsed())
+
+            _prune_profiles(profile_folder, current_app.config['PROFILE_MAX_FILES'])
+
+            response = make_response(result)
+            response.headers['X-Profile-Id'] = name
+            return response
+        return decorator
+    return wrapper
+
+
+# Process-wide low-rate sampler, started by create_app when enabled
+continuous_sampler = None
+
+
+def start_continuous_sampler(interval):
+    """Start sampling every thread in the process at a low rate"""
+    global continuous_sampler
+    if continuous_sampler is None:
+        continuous_sampler = StackSampler(interval=interval).start()
+        print(f"Continuous profiler sampling every {interval}s")
+    return continuous_sampler
\ No newline at end of file
@@ -0,0 +1,162 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask_jwt_extended import get_jwt_identity
+
+from utils.admission import Overloaded, overloaded_response
+from utils.metrics import RATE_LIMITED
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1.0):
+        """
+        Refill the bucket for the time since its last use, then take cost
+        tokens if there are enough
+        Returns: (allowed, tokens left)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file, shared by every worker process on the
+    host. Each take() is one short write transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode; transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate, cost=1.0):
+        """
+        Returns: (allowed, tokens left)
+        """
+        # Wall clock, since monotonic clocks aren't comparable across processes
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+
+class RateLimiter:
+    """
+    Per-user token buckets, one per endpoint class. A class allows bursts
+    of up to `burst` requests and refills at `per_minute` requests a minute.
+    """
+
+    def __init__(self, store, limits):
+        """
+        store: MemoryBucketStore or SQLiteBucketStore
+        limits: Dictionary of endpoint class -> (burst, per_minute)
+        """
+        self.store = store
+        self.limits = limits
+
+    def check(self, endpoint_class, identity):
+        """
+        Take a token for one request
+        Returns: Tokens left in the bucket
+        Raises: Overloaded (429) when the bucket is empty
+        """
+        burst, per_minute = self.limits[endpoint_class]
+        rate = per_minute / 60.0
+        allowed, tokens = self.store.take(f"{endpoint_class}:{identity}", burst, rate)
+        if not allowed:
+            RATE_LIMITED.inc(endpoint_class)
+            raise Overloaded(
+                f"Rate limit exceeded for {endpoint_class} analyses, try again later",
+                429,
+                max(1, math.ceil((1.0 - tokens) / rate))
+            )
+        return tokens
+
+
+def create_rate_limiter(config):
+    """
+    Build the rate limiter described by the config
+    Returns: RateLimiter, or None when rate limiting is disabled
+    """
+    if not config.RATE_LIMIT_ENABLED:
+        return None
+
+    if config.RATE_LIMIT_STORE == 'sqlite':
+        store = SQLiteBucketStore(config.RATE_LIMIT_DB)
+    elif config.RATE_LIMIT_STORE == 'memory':
+        store = MemoryBucketStore()
+    else:
+        raise ValueError(f"Unknown rate limit store: {config.RATE_LIMIT_STORE}")
+
+    return RateLimiter(store, {
+        'image': (config.RATE_LIMIT_IMAGE_BURST, config.RATE_LIMIT_IMAGE_PER_MINUTE),
+        'video': (config.RATE_LIMIT_VIDEO_BURST, config.RATE_LIMIT_VIDEO_PER_MINUTE)
+    })
+
+
+def rate_limited(limiter, endpoint_class):
+    """
+    Decorator to charge a request to the caller's bucket for an endpoint
+    class. Must come after @jwt_required().
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorated(*args, **kwargs):
+            if limiter is None:
+                return fn(*args, **kwargs)
+
+            try:
+                limiter.check(endpoint_class, get_jwt_identity())
+            except Overloaded as e:
+                return overloaded_response(e)
+
+            return fn(*args, **kwargs)
+        return decorated
+    return wrapper
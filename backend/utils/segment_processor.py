@@ -0,0 +1,197 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from inference.client import InferenceClient, RemoteDetector
+from models.cnn_model import DeepfakeDetector, summarize_frame_results
+from utils.frame_cache import FrameCache
+from utils.video_processor import VideoProcessor
+
+# State of one worker process, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(processor_settings, cache_settings, inference_address):
+    frame_cache = FrameCache(**cache_settings) if cache_settings else None
+    _worker['processor'] = VideoProcessor(frame_cache=frame_cache, **processor_settings)
+    _worker['detectors'] = {}
+    _worker['client'] = InferenceClient(inference_address) if inference_address else None
+
+
+def _get_detector(model_path, model_version):
+    """
+    Detector for a model version, loaded once per worker process (or a
+    client of the inference server when one is configured)
+    """
+    if _worker['client'] is not None:
+        return RemoteDetector(_worker['client'], model_version)
+
+    key = (model_path, model_version)
+    detector = _worker['detectors'].get(key)
+    if detector is None:
+        detector = DeepfakeDetector(model_path, version=model_version)
+        detector.load_model()
+        _worker['detectors'][key] = detector
+    return detector
+
+
+def _analyze_segment(video_path, frame_range, max_frames, model_path, model_version, content_hash=None):
+    """
+    Decode, sample and score one segment inside a worker process
+    Returns: Dictionary with the segment verdict and per-frame results
+             numbered by their position in the whole video
+    """
+    processor = _worker['processor']
+    frames, frame_numbers = processor.sample_frames(
+        video_path, max_frames, frame_range=frame_range, content_hash=content_hash
+    )
+
+    segment = {'frame_range': list(frame_range), 'frames': len(frame_numbers)}
+    if len(frame_numbers) == 0:
+        return dict(segment, prediction=None, confidence=None, frame_results=[])
+
+    detector = _get_detector(model_path, model_version)
+    frames = processor.preprocess_frames(frames, normalize=False)
+    prediction, confidence = detector.predict_video(frames)
+    frame_analysis = detector.analyze_frames(frames, frame_numbers=frame_numbers)
+
+    return dict(
+        segment,
+        prediction=prediction,
+        confidence=float(confidence),
+        frame_results=frame_analysis['frame_results']
+    )
+
+
+class SegmentProcessor:
+    """
+    Splits long videos into time segments that are decoded, sampled and
+    scored in parallel worker processes, then merges the per-segment
+    results. Workers are started lazily with the 'spawn' method (forking a
+    threaded web server is unsafe) and keep their VideoProcessor and
+    detectors between requests.
+    """
+
+    def __init__(self, processor_settings, cache_settings=None, workers=0,
+                 min_seconds=300, segment_seconds=120, frames_per_segment=30, inference_address=None):
+        """
+        processor_settings: VideoProcessor keyword arguments for workers
+        cache_settings: FrameCache keyword arguments, or None for no cache
+        workers: worker processes (0 = one per CPU)
+        min_seconds: shortest video that is split into segments
+        segment_seconds: target length of one segment
+        frames_per_segment: frame budget of each segment
+        inference_address: inference server the workers send frames to,
+                           or None to load the model in each worker
+        """
+        self.processor_settings = processor_settings
+        self.cache_settings = cache_settings
+        self.workers = workers or os.cpu_count() or 1
+        self.min_seconds = min_seconds
+        self.segment_seconds = segment_seconds
+        self.frames_per_segment = frames_per_segment
+        self.inference_address = inference_address
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def should_split(self, video_info):
+        """Whether a video is long enough to be processed in segments"""
+        return video_info['duration'] >= self.min_seconds and video_info['frame_count'] > 0
+
+    def plan_segments(self, video_info):
+        """
+        Split the video into equal segments of about segment_seconds, and
+        at least one per worker
+        Returns: List of (start, end) frame ranges, end exclusive
+        """
+        frame_count = video_info['frame_count']
+        count = max(math.ceil(video_info['duration'] / self.segment_seconds), self.workers)
+        count = min(count, frame_count)
+        bounds = np.linspace(0, frame_count, count + 1, dtype=int).tolist()
+        return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.processor_settings, self.cache_settings, self.inference_address)
+                )
+            return self._executor
+
+    def analyze(self, video_path, video_info, detector, on_segment=None, content_hash=None):
+        """
+        Score every segment of a video in the worker pool
+        detector: the request's detector; workers load the same model
+                  version from its model_path
+        on_segment: optional callback called with each segment result as
+                    soon as it finishes (in completion order)
+        content_hash: SHA-256 of the video, if known, for the workers'
+                      frame caches
+        Returns: (prediction, confidence, frame_analysis) where
+                 frame_analysis matches analyze_frames with global frame
+                 numbers, plus a per-segment breakdown
+        """
+        try:
+            executor = self._get_executor()
+            futures = [
+                executor.submit(
+                    _analyze_segment,
+                    video_path,
+                    frame_range,
+                    self.frames_per_segment,
+                    detector.model_path,
+                    detector.version,
+                    content_hash
+                )
+                for frame_range in self.plan_segments(video_info)
+            ]
+            for future in as_completed(futures):
+                if on_segment is not None:
+                    on_segment(future.result())
+            return self.merge([future.result() for future in futures])
+
+        except Exception as e:
+            raise Exception(f"Error processing video segments: {str(e)}")
+
+    def merge(self, segments):
+        """
+        Combine per-segment results. The video verdict averages each
+        segment's fake probability weighted by its frame count.
+        Returns: (prediction, confidence, frame_analysis)
+        """
+        frame_results = sorted(
+            (r for segment in segments for r in segment['frame_results']),
+            key=lambda r: r['frame_number']
+        )
+        if not frame_results:
+            raise ValueError("No frames could be decoded from the video")
+
+        scored = [s for s in segments if s['prediction'] is not None]
+        weights = np.array([s['frames'] for s in scored], dtype=np.float64)
+        fake_probabilities = np.array([
+            s['confidence'] if s['prediction'] == 'fake' else 1.0 - s['confidence']
+            for s in scored
+        ])
+        fake_probability = float(np.average(fake_probabilities, weights=weights))
+        prediction = "fake" if fake_probability > 0.5 else "real"
+        confidence = fake_probability if prediction == "fake" else 1.0 - fake_probability
+
+        frame_analysis = summarize_frame_results(frame_results)
+        frame_analysis['segments'] = [
+            {k: s[k] for k in ('frame_range', 'frames', 'prediction', 'confidence')}
+            for s in segments
+        ]
+        return prediction, confidence, frame_analysis
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from utils.video_processor import VideoProcessor
+
+# Renditions served for each upload
+THUMBNAIL_KINDS = ('thumbnail', 'poster')
+
+# Sampled frames a video poster is picked from
+POSTER_CANDIDATES = 5
+
+
+class ThumbnailCache:
+    """
+    JPEG thumbnails and poster frames of uploads, rendered on first request
+    and kept on disk by analysis id. Images are decoded at reduced
+    resolution; videos are sampled with the same VideoProcessor settings as
+    analyses and the sharpest sampled frame becomes the poster.
+    """
+
+    def __init__(self, cache_dir, image_processor, video_settings, sizes, quality=80):
+        """
+        video_settings: VideoProcessor keyword arguments (sampler, backend...)
+        sizes: Dictionary of kind -> longest side in pixels
+        """
+        self.cache_dir = cache_dir
+        self.image_processor = image_processor
+        self.video_settings = video_settings
+        self.sizes = sizes
+        self.quality = quality
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, analysis_id, kind):
+        return os.path.join(self.cache_dir, f"{analysis_id}_{kind}.jpg")
+
+    def get(self, analysis, kind):
+        """
+        Path of a rendition, rendering it first if it isn't cached
+        Raises: FileNotFoundError when the upload is gone
+        """
+        path = self.path_for(analysis.id, kind)
+        if os.path.exists(path):
+            return path
+
+        if not analysis.file_path or not os.path.exists(analysis.file_path):
+            raise FileNotFoundError(f"Upload for analysis {analysis.id} is no longer available")
+
+        try:
+            max_side = self.sizes[kind]
+            if analysis.file_type == 'video':
+                image = self._render_video(analysis.file_path, max_side)
+            else:
+                image = self._render_image(analysis.file_path, max_side)
+
+            ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                raise ValueError("Could not encode thumbnail")
+
+            # Write then rename, so concurrent requests never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encoded.tobytes())
+            os.replace(tmp_path, path)
+            return path
+
+        except Exception as e:
+            raise Exception(f"Error rendering {kind}: {str(e)}")
+
+    def evict(self, analysis_id):
+        """Remove every cached rendition of an analysis"""
+        for kind in THUMBNAIL_KINDS:
+            try:
+                os.remove(self.path_for(analysis_id, kind))
+            except FileNotFoundError:
+                pass
+
+    def _fit(self, width, height, max_side):
+        scale = min(1.0, max_side / max(width, height))
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _render_image(self, file_path, max_side):
+        # JPEGs are decoded straight at close to the rendition size
+        img, _ = self.image_processor.decode_image(file_path, min_side=max_side)
+        height, width = img.shape[:2]
+        size = self._fit(width, height, max_side)
+        if size != (width, height):
+            img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        return img
+
+    def _render_video(self, file_path, max_side):
+        info = VideoProcessor(**self.video_settings).get_video_info(file_path)
+        size = self._fit(info['width'], info['height'], max_side)
+
+        processor = VideoProcessor(target_size=size, **self.video_settings)
+        frames, _ = processor.sample_frames(file_path, max_frames=POSTER_CANDIDATES)
+        if len(frames) == 0:
+            raise ValueError("No frames could be decoded from the video")
+
+        sharpness = [cv2.Laplacian(cv2.cvtColor(f, cv2.COLOR_RGB2GRAY), cv2.CV_64F).var() for f in frames]
+        return cv2.cvtColor(frames[int(np.argmax(sharpness))], cv2.COLOR_RGB2BGR)
@@ -0,0 +1,127 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+
+from models.user import db, User, ChangeCounter
+from utils.metrics import CACHE_REQUESTS
+
+
+class UserCache:
+    """
+    In-process LRU of user records (User.to_dict() snapshots) keyed by id,
+    so token checks and admin role checks don't query the user on every
+    request. Entries expire after ttl seconds; deleted users are cached as
+    None, so their tokens are turned away without a query either.
+
+    Signups, role changes and deletions bump the 'users' change counter.
+    Each process re-reads it at most every check_interval seconds and drops
+    all its entries when it moved, so a change made in one worker reaches
+    the others within check_interval rather than ttl. invalidate() applies
+    it in the current process at once.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60, check_interval=1):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = -math.inf
+        # Bumped whenever entries are dropped, so a load that raced it
+        # isn't stored
+        self._generation = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config['USER_CACHE_MAX_ENTRIES']
+        self.ttl = app.config['USER_CACHE_TTL_SECONDS']
+        self.check_interval = app.config['USER_CACHE_CHECK_SECONDS']
+        self.clear()
+
+    def _check_version(self, now):
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+
+        version = db.session.query(ChangeCounter.version).filter_by(scope=ChangeCounter.USERS).scalar() or 0
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+                self._generation += 1
+
+    def _lookup(self, user_id):
+        """
+        Returns: (User.to_dict() dictionary or None, created_at as a Unix
+                  timestamp or None)
+        """
+        user_id = int(user_id)
+        now = time.monotonic()
+        self._check_version(now)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(user_id)
+                CACHE_REQUESTS.inc('users', 'hit')
+                return entry[0], entry[1]
+            generation = self._generation
+
+        CACHE_REQUESTS.inc('users', 'miss')
+        user = User.query.get(user_id)
+        if user is not None:
+            # created_at is naive UTC
+            created = user.created_at.replace(tzinfo=timezone.utc).timestamp()
+            entry = (user.to_dict(), created, now + self.ttl)
+        else:
+            entry = (None, None, now + self.ttl)
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = entry
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry[0], entry[1]
+
+    def get(self, user_id):
+        """
+        User record of an id, loaded from the database on a miss. Must be
+        called inside an app context.
+        Returns: User.to_dict() dictionary, or None if the user doesn't exist
+        """
+        record, _ = self._lookup(user_id)
+        return dict(record) if record is not None else None
+
+    def role(self, user_id):
+        """
+        Returns: The user's current role, or None if the user doesn't exist
+        """
+        record, _ = self._lookup(user_id)
+        return record['role'] if record is not None else None
+
+    def is_revoked(self, jwt_payload):
+        """
+        True for tokens of deleted users, and of users whose id was reused
+        by a later account (issued before that account was created)
+        """
+        record, created = self._lookup(jwt_payload['sub'])
+        return record is None or jwt_payload.get('iat', 0) < math.floor(created)
+
+    def invalidate(self, user_id):
+        """Drop a user's entry after their record changed or was deleted"""
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_at = -math.inf
+            self._generation += 1
+
+
+user_cache = UserCache()
@@ -0,0 +1,206 @@
+import cv2
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+class OpenCVVideo:
+    """
+    Video opened with cv2.VideoCapture. Decodes on one thread at native
+    resolution; frames are resized and converted after decoding.
+    """
+
+    def __init__(self, video_path):
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise ValueError(f"Could not open video: {video_path}")
+
+        self.fps = float(self.cap.get(cv2.CAP_PROP_FPS))
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.duration = self.frame_count / self.fps if self.fps > 0 else 0
+
+    def read_frames(self, frame_indices, out, target_size):
+        """
+        Decode the given sorted frame indices, resized to target_size, as
+        RGB into out
+        Returns: (out trimmed to the frames read, their frame numbers)
+        """
+        wanted = set(frame_indices)
+        frame_numbers = []
+        current_frame = 0
+        last_frame = max(frame_indices) if frame_indices else -1
+
+        # Start mid-video (e.g. one segment of a long video) with a seek
+        # rather than grabbing every frame before it
+        if frame_indices and frame_indices[0] > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_indices[0])
+            current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+        while current_frame <= last_frame:
+            # grab() skips the colour conversion for frames we don't keep
+            if not self.cap.grab():
+                break
+
+            if current_frame in wanted:
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    break
+
+                # Resize into the buffer, then convert BGR to RGB in place
+                slot = out[len(frame_numbers)]
+                cv2.resize(frame, target_size, dst=slot)
+                cv2.cvtColor(slot, cv2.COLOR_BGR2RGB, dst=slot)
+                frame_numbers.append(current_frame)
+
+            current_frame += 1
+
+        return out[:len(frame_numbers)], frame_numbers
+
+    def close(self):
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PyAVVideo:
+    """
+    Video opened with PyAV (FFmpeg). The codec decodes on several threads,
+    libswscale scales and converts to RGB in one pass, and the frame count
+    comes from the container (or its duration) rather than OpenCV's
+    estimate. Long gaps between wanted frames are crossed by seeking to
+    the nearest keyframe instead of decoding everything in between.
+    """
+
+    def __init__(self, video_path, threads=0):
+        try:
+            self.container = av.open(video_path)
+        except Exception as e:
+            raise ValueError(f"Could not open video: {video_path} ({str(e)})")
+
+        if not self.container.streams.video:
+            self.container.close()
+            raise ValueError(f"No video stream in: {video_path}")
+
+        self.stream = self.container.streams.video[0]
+        # Frame threading decodes several frames at once; 0 = one per core
+        self.stream.thread_type = 'AUTO'
+        self.stream.codec_context.thread_count = threads
+
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 0.0
+        self.width = int(self.stream.codec_context.width)
+        self.height = int(self.stream.codec_context.height)
+
+        if self.stream.duration is not None and self.stream.time_base is not None:
+            self.duration = float(self.stream.duration * self.stream.time_base)
+        elif self.container.duration is not None:
+            self.duration = self.container.duration / av.time_base
+        else:
+            self.duration = 0.0
+
+        self.frame_count = int(self.stream.frames) or int(round(self.duration * self.fps))
+        start_time = self.stream.start_time
+        self._start = float(start_time * self.stream.time_base) if start_time is not None else 0.0
+        # Gaps longer than this (in frames) are crossed by seeking
+        self._seek_gap = max(int(self.fps * 2), 30)
+
+    def _frame_index(self, frame, fallback):
+        if frame.pts is None or self.fps <= 0:
+            return fallback
+        return int(round((float(frame.pts * self.stream.time_base) - self._start) * self.fps))
+
+    def _seek(self, frame_index):
+        target = int((frame_index / self.fps + self._start) / self.stream.time_base)
+        self.container.seek(target, stream=self.stream, backward=True, any_frame=False)
+
+    def read_frames(self, frame_indices, out, target_size):
+        """
+        Decode the given sorted frame indices, resized to target_size, as
+        RGB into out
+        Returns: (out trimmed to the frames read, their frame numbers)
+        """
+        width, height = target_size
+        frame_numbers = []
+        pending = list(frame_indices)
+        current_frame = -1
+        # Only seek again once a seek has produced a frame, so a stream
+        # whose keyframes are far apart cannot seek back and forth forever
+        may_seek = self.fps > 0
+
+        while pending:
+            if may_seek and pending[0] - current_frame > self._seek_gap:
+                self._seek(pending[0])
+                may_seek = False
+
+            seek_again = False
+            for frame in self.container.decode(self.stream):
+                current_frame = self._frame_index(frame, current_frame + 1)
+
+                # Drop wanted indices the decoder has already passed
+                while pending and pending[0] < current_frame:
+                    pending.pop(0)
+                if not pending:
+                    break
+
+                if current_frame == pending[0]:
+                    pending.pop(0)
+                    out[len(frame_numbers)] = frame.reformat(
+                        width=width, height=height, format='rgb24'
+                    ).to_ndarray()
+                    frame_numbers.append(current_frame)
+                    may_seek = self.fps > 0
+
+                if pending and may_seek and pending[0] - current_frame > self._seek_gap:
+                    seek_again = True
+                    break
+
+            if not seek_again:
+                break
+
+        return out[:len(frame_numbers)], frame_numbers
+
+    def close(self):
+        self.container.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+VIDEO_BACKENDS = ('opencv', 'pyav')
+
+
+def open_video(video_path, backend='opencv', threads=0):
+    """
+    Open a video with the named decode backend
+    threads: decoder threads for the pyav backend (0 = automatic)
+    Returns: OpenCVVideo or PyAVVideo, usable as a context manager
+    """
+    if backend == 'pyav':
+        return PyAVVideo(video_path, threads=threads)
+    return OpenCVVideo(video_path)
+
+
+def resolve_backend(backend):
+    """
+    Validate a backend name, falling back to OpenCV when PyAV is not
+    installed
+    Returns: Backend name to use
+    """
+    if backend not in VIDEO_BACKENDS:
+        raise ValueError(f"Unknown video decode backend: {backend}")
+    if backend == 'pyav' and av is None:
+        print("⚠️  PyAV is not installed, falling back to OpenCV video decoding")
+        return 'opencv'
+    return backend
\ No newline at end of file
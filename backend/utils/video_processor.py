@@ -2,15 +2,47 @@ import cv2
 import numpy as np
 import os
 from datetime import timedelta
+from utils.buffers import buffer_pool, normalize_uint8
+from utils.face_detection import detect_faces, crop_faces
+from utils.frame_sampling import frame_signature, split_shots, allocate_budget, select_frames
+from utils.video_backends import open_video, resolve_backend
+
+SAMPLERS = ('uniform', 'adaptive')
 
 class VideoProcessor:
     """
     Handles video preprocessing for deepfake detection
     """
     
-    def __init__(self, target_size=(224, 224), frames_to_extract=30):
+    def __init__(self, target_size=(224, 224), frames_to_extract=30, frame_cache=None,
+                 sampler='uniform', probes_per_frame=4, cut_threshold=0.1, duplicate_threshold=1.0,
+                 backend='opencv', decode_threads=0):
+        """
+        frame_cache: optional FrameCache; sampled frames are then decoded
+                     once per video and read back memory-mapped afterwards
+        sampler: 'uniform' takes evenly spaced frames; 'adaptive' probes
+                 probes_per_frame times as many frames, splits them into
+                 shots, spreads the budget across shots and drops
+                 near-duplicates (so static videos use fewer frames)
+        cut_threshold: shot cut distance in [0, 1] between adjacent probes
+        duplicate_threshold: mean absolute thumbnail difference (0-255)
+                             under which a probe counts as a duplicate
+        backend: 'opencv' or 'pyav' (multi-threaded FFmpeg decoding with
+                 scaling and RGB conversion done in the decoder)
+        decode_threads: decoder threads for 'pyav' (0 = one per core)
+        """
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown frame sampler: {sampler}")
+        
         self.target_size = target_size
         self.frames_to_extract = frames_to_extract
+        self.frame_cache = frame_cache
+        self.sampler = sampler
+        self.probes_per_frame = probes_per_frame
+        self.cut_threshold = cut_threshold
+        self.duplicate_threshold = duplicate_threshold
+        self.backend = resolve_backend(backend)
+        self.decode_threads = decode_threads
     
     def get_video_info(self, video_path):
         """
@@ -18,18 +50,12 @@ class VideoProcessor:
         Returns: Dictionary with video information
         """
         try:
-            cap = cv2.VideoCapture(video_path)
-            
-            if not cap.isOpened():
-                raise ValueError(f"Could not open video: {video_path}")
-            
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            duration = frame_count / fps if fps > 0 else 0
-            
-            cap.release()
+            with open_video(video_path, self.backend, self.decode_threads) as video:
+                fps = video.fps
+                frame_count = video.frame_count
+                width = video.width
+                height = video.height
+                duration = video.duration
             
             return {
                 'fps': float(fps),
@@ -43,70 +69,122 @@ class VideoProcessor:
         except Exception as e:
             raise Exception(f"Error getting video info: {str(e)}")
     
-    def extract_frames(self, video_path, max_frames=None):
+    def extract_frames(self, video_path, max_frames=None, out=None):
         """
-        Extract frames from video uniformly
-        Returns: List of frame arrays
+        Extract frames from video with the configured sampler
+        out: optional uint8 array of shape (n, height, width, 3) with room
+             for at least max_frames frames; frames are resized into it
+             directly instead of being collected in a list. On a frame
+             cache hit the cached array is returned instead and out is
+             left untouched.
+        Returns: uint8 array of RGB frames, shape (count, height, width, 3)
+        """
+        return self.sample_frames(video_path, max_frames, out)[0]
+    
+    def sample_frames(self, video_path, max_frames=None, out=None, frame_range=None, content_hash=None):
+        """
+        Same as extract_frames, but also reports where each frame came from
+        frame_range: optional (start, end) frame numbers, end exclusive, to
+                     sample only that part of the video
+        content_hash: SHA-256 of the file if already known (from
+                      save_upload_file); otherwise it is computed for the
+                      frame cache
+        Returns: (uint8 array of RGB frames, list of source frame numbers)
         """
         try:
-            cap = cv2.VideoCapture(video_path)
-            
-            if not cap.isOpened():
-                raise ValueError(f"Could not open video: {video_path}")
-            
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # Determine number of frames to extract
             num_frames = max_frames or self.frames_to_extract
-            num_frames = min(num_frames, frame_count)
-            
-            # Calculate frame indices to extract uniformly
-            if num_frames >= frame_count:
-                frame_indices = list(range(frame_count))
-            else:
-                frame_indices = np.linspace(0, frame_count - 1, num_frames, dtype=int)
             
-            frames = []
-            current_frame = 0
+            if self.frame_cache is None:
+                return self._decode(video_path, num_frames, out, frame_range)
             
-            while cap.isOpened():
-                ret, frame = cap.read()
-                
-                if not ret:
-                    break
-                
-                if current_frame in frame_indices:
-                    # Convert BGR to RGB
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    
-                    # Resize frame
-                    frame_resized = cv2.resize(frame_rgb, self.target_size)
-                    
-                    frames.append(frame_resized)
-                
-                current_frame += 1
-                
-                if len(frames) >= num_frames:
-                    break
-            
-            cap.release()
+            params = {
+                'sampler': self.sampler,
+                'max_frames': num_frames,
+                'size': self.target_size,
+                'backend': self.backend,
+                'frame_range': frame_range
+            }
+            if self.sampler == 'adaptive':
+                params.update(
+                    probes_per_frame=self.probes_per_frame,
+                    cut_threshold=self.cut_threshold,
+                    duplicate_threshold=self.duplicate_threshold
+                )
+            if content_hash is None:
+                content_hash = self.frame_cache.content_hash(video_path)
+            key = self.frame_cache.make_key(content_hash, **params)
+            cached = self.frame_cache.get(key)
+            if cached is not None:
+                return cached
             
-            return frames
+            frames, frame_numbers = self._decode(video_path, num_frames, out, frame_range)
+            self.frame_cache.put(key, frames, frame_numbers)
+            return frames, frame_numbers
             
         except Exception as e:
             raise Exception(f"Error extracting frames: {str(e)}")
     
-    def preprocess_frames(self, frames):
+    def _decode(self, video_path, num_frames, out=None, frame_range=None):
+        with open_video(video_path, self.backend, self.decode_threads) as video:
+            start, end = 0, video.frame_count
+            if frame_range is not None:
+                start, end = max(frame_range[0], 0), min(frame_range[1], video.frame_count)
+            frame_count = max(end - start, 0)
+            num_frames = min(num_frames, frame_count)
+            
+            width, height = self.target_size
+            if out is None:
+                out = np.empty((num_frames, height, width, 3), dtype=np.uint8)
+            elif len(out) < num_frames:
+                raise ValueError(f"Frame buffer holds {len(out)} frames, need {num_frames}")
+            
+            if self.sampler == 'adaptive' and num_frames < frame_count:
+                return self._sample_adaptive(video, start, end, num_frames, out)
+            
+            # Calculate frame indices to extract uniformly
+            frame_indices = np.linspace(start, end - 1, num_frames, dtype=int).tolist()
+            return video.read_frames(frame_indices, out, self.target_size)
+    
+    def _sample_adaptive(self, video, start, end, num_frames, out):
+        """
+        Probe frames start..end-1 densely, split the probes into shots and
+        keep a non-duplicate subset of at most num_frames frames
+        Returns: (uint8 array of RGB frames, their frame numbers)
+        """
+        num_probes = min(end - start, num_frames * self.probes_per_frame)
+        probe_indices = sorted(set(np.linspace(start, end - 1, num_probes, dtype=int).tolist()))
+        
+        height, width = out.shape[1:3]
+        probes, probe_numbers = video.read_frames(
+            probe_indices,
+            buffer_pool.get('video_probes', len(probe_indices), (height, width, 3)),
+            self.target_size
+        )
+        
+        signatures = [frame_signature(frame) for frame in probes]
+        shots = split_shots(signatures, self.cut_threshold)
+        counts = allocate_budget([end - start for start, end in shots], num_frames)
+        selected = select_frames(signatures, shots, counts, self.duplicate_threshold)
+        
+        for i, probe in enumerate(selected):
+            out[i] = probes[probe]
+        
+        return out[:len(selected)], [probe_numbers[probe] for probe in selected]
+    
+    def preprocess_frames(self, frames, normalize=True):
         """
         Preprocess extracted frames for CNN model
-        Returns: Normalized numpy array
+        normalize: scale to float32 [0, 1]; pass False to keep the uint8
+                   batch as-is (no copy) and normalize at the model boundary
+        Returns: Batch as a numpy array
         """
         try:
-            # Convert list to numpy array
-            frames_array = np.array(frames, dtype=np.float32)
+            # No copy when frames is already a uint8 batch
+            frames_array = np.asarray(frames, dtype=np.uint8)
             
             # Normalize pixel values to [0, 1]
-            frames_array = frames_array / 255.0
+            if normalize:
+                return normalize_uint8(frames_array)
             
             return frames_array
             
@@ -122,11 +200,6 @@ class VideoProcessor:
             # Extract frames
             frames = self.extract_frames(video_path, max_frames)
             
-            # Load Haar Cascade
-            face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            
             face_images = []
             
             for frame in frames:
@@ -134,25 +207,52 @@ class VideoProcessor:
                 gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
                 
                 # Detect faces
-                faces = face_cascade.detectMultiScale(
-                    gray,
-                    scaleFactor=1.1,
-                    minNeighbors=5,
-                    minSize=(30, 30)
-                )
+                faces = detect_faces(gray)
                 
                 # Extract first face from each frame
                 if len(faces) > 0:
-                    (x, y, w, h) = faces[0]  # Take first face
-                    face = frame[y:y+h, x:x+w]
-                    face = cv2.resize(face, self.target_size)
-                    face_images.append(face)
+                    face_images.extend(crop_faces(frame, faces[:1], self.target_size))
             
             return face_images
             
         except Exception as e:
             raise Exception(f"Error extracting faces from video: {str(e)}")
     
+    def extract_face_batch(self, frames, frame_numbers=None, max_faces=None, out=None):
+        """
+        Detect every face in already extracted RGB frames and crop them all
+        into one batch, so the model scores them in a single call
+        frame_numbers: optional source frame number of each frame, reported
+                       as each face's frame_number (defaults to position)
+        max_faces: stop after this many faces
+        out: optional uint8 array with room for max_faces crops
+        Returns: (uint8 batch of shape (faces, height, width, 3),
+                  list of {'frame_number', 'frame_index', 'box'} per face,
+                  frame_index being the frame's position in frames)
+        """
+        try:
+            face_index = []
+            for i, frame in enumerate(frames):
+                gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+                frame_number = int(frame_numbers[i]) if frame_numbers is not None else i
+                for box in detect_faces(gray):
+                    face_index.append({'frame_number': frame_number, 'frame_index': i, 'box': box})
+            
+            if max_faces is not None:
+                face_index = face_index[:max_faces]
+            
+            width, height = self.target_size
+            if out is None:
+                out = np.empty((len(face_index), height, width, 3), dtype=np.uint8)
+            
+            for i, face in enumerate(face_index):
+                crop_faces(frames[face['frame_index']], [face['box']], self.target_size, out=out[i:i+1])
+            
+            return out[:len(face_index)], face_index
+            
+        except Exception as e:
+            raise Exception(f"Error extracting face batch: {str(e)}")
+    
     def save_frames(self, frames, output_dir, prefix="frame"):
         """
         Save extracted frames to directory
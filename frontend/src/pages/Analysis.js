@@ -9,6 +9,7 @@ const Analysis = () => {
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState('');
+  const [progress, setProgress] = useState(null);
 
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0];
@@ -54,23 +55,64 @@ const Analysis = () => {
     setLoading(true);
     setError('');
     setResult(null);
+    setProgress(null);
 
     try {
       const formData = new FormData();
       formData.append('file', file);
 
-      let response;
+      let data;
       if (fileType === 'image') {
-        response = await detectionAPI.analyzeImage(formData);
+        const response = await detectionAPI.analyzeImage(formData);
+        data = response.data;
       } else {
-        response = await detectionAPI.analyzeVideo(formData);
+        data = await analyzeVideoStreaming(formData);
       }
 
-      setResult(response.data);
+      setResult(data);
+      setLoading(false);
+      setProgress(null);
+      loadDetails(data.analysis_id);
     } catch (err) {
-      setError(err.response?.data?.error || 'Analysis failed. Please try again.');
-    } finally {
+      setError(err.response?.data?.error || err.message || 'Analysis failed. Please try again.');
       setLoading(false);
+      setProgress(null);
+    }
+  };
+
+  // Videos stream their progress: the current stage and the running
+  // fake/real tally as frames (or segments of long videos) are scored
+  const analyzeVideoStreaming = async (formData) => {
+    let data = null;
+    setProgress({ stage: 'upload', tally: null });
+    await detectionAPI.analyzeVideoStream(formData, (event, payload) => {
+      if (event === 'stage') {
+        setProgress((current) => ({ ...current, stage: payload.stage }));
+      } else if (event === 'frame') {
+        setProgress((current) => ({ ...current, tally: payload.tally }));
+      } else if (event === 'result') {
+        data = payload;
+      } else if (event === 'error') {
+        throw new Error(payload.error);
+      }
+    });
+    if (!data) {
+      throw new Error('Analysis ended without a result');
+    }
+    return data;
+  };
+
+  // The verdict comes back first; quality and face details follow
+  const loadDetails = async (analysisId) => {
+    try {
+      const { data } = await detectionAPI.getAnalysisDetails(analysisId, 'quality,faces');
+      setResult((current) => current && current.analysis_id === analysisId ? {
+        ...current,
+        quality_metrics: data.details.quality,
+        face_count: data.details.faces?.face_count,
+      } : current);
+    } catch (err) {
+      // Details are optional; the verdict is already shown
     }
   };
 
@@ -80,6 +122,7 @@ const Analysis = () => {
     setPreview(null);
     setResult(null);
     setError('');
+    setProgress(null);
   };
 
   return (
@@ -167,6 +210,31 @@ const Analysis = () => {
             </div>
           )}
 
+          {loading && progress && (
+            <div className="mt-4 bg-gray-50 p-4 rounded-lg">
+              <p className="text-sm text-gray-600">
+                Stage: <span className="font-semibold">{progress.stage.replace(/_/g, ' ')}</span>
+              </p>
+              {progress.tally && (
+                <div className="mt-2">
+                  <div className="flex h-2 rounded overflow-hidden bg-gray-200">
+                    <div
+                      className="bg-red-500"
+                      style={{ width: `${(100 * progress.tally.fake_frames) / progress.tally.total_frames}%` }}
+                    />
+                    <div
+                      className="bg-green-500"
+                      style={{ width: `${(100 * progress.tally.real_frames) / progress.tally.total_frames}%` }}
+                    />
+                  </div>
+                  <p className="text-xs text-gray-600 mt-1">
+                    {progress.tally.total_frames} frames scored: {progress.tally.fake_frames} fake, {progress.tally.real_frames} real
+                  </p>
+                </div>
+              )}
+            </div>
+          )}
+
           {result && (
             <div className="mt-8 border-t pt-8">
               <h2 className="text-2xl font-bold text-gray-900 mb-6">Analysis Results</h2>
@@ -200,7 +268,7 @@ const Analysis = () => {
                   <p className="font-semibold">{result.file_size_mb} MB</p>
                 </div>
 
-                {result.face_count !== undefined && (
+                {result.face_count != null && (
                   <div className="bg-gray-50 p-4 rounded-lg">
                     <p className="text-sm text-gray-600">Faces Detected</p>
                     <p className="font-semibold">{result.face_count}</p>
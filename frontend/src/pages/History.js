@@ -7,6 +7,7 @@ const History = () => {
   const [loading, setLoading] = useState(true);
   const [page, setPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
+  const [mediaUrls, setMediaUrls] = useState({});
 
   useEffect(() => {
     fetchHistory();
@@ -18,6 +19,12 @@ const History = () => {
       const response = await detectionAPI.getHistory(page, 10);
       setHistory(response.data.history);
       setTotalPages(response.data.total_pages);
+
+      const ids = response.data.history.map((item) => item.id);
+      if (ids.length > 0) {
+        const urls = await detectionAPI.getMediaUrls(ids);
+        setMediaUrls(urls.data.urls);
+      }
     } catch (error) {
       console.error('Error fetching history:', error);
     } finally {
@@ -86,7 +93,24 @@ const History = () => {
                     {history.map((item) => (
                       <tr key={item.id} className="hover:bg-gray-50">
                         <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
-                          {item.file_name}
+                          <a
+                            href={mediaUrls[item.id]?.media}
+                            target="_blank"
+                            rel="noopener noreferrer"
+                            className="flex items-center gap-3"
+                          >
+                            {mediaUrls[item.id] ? (
+                              <img
+                                src={mediaUrls[item.id].thumbnail}
+                                alt=""
+                                loading="lazy"
+                                className="h-10 w-14 object-cover rounded bg-gray-100"
+                              />
+                            ) : (
+                              <span className="h-10 w-14 rounded bg-gray-100" />
+                            )}
+                            {item.file_name}
+                          </a>
                         </td>
                         <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
                           <span className={`px-2 py-1 rounded-full text-xs ${
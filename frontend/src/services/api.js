@@ -37,10 +37,51 @@ export const detectionAPI = {
     api.post('/detection/analyze/video', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     }),
+  // Streams Server-Sent Events; onEvent(event, data) is called for each
+  // 'stage', 'frame', 'result' and 'error' event as it arrives
+  analyzeVideoStream: async (formData, onEvent) => {
+    const response = await fetch(`${API_BASE_URL}/detection/analyze/video/stream`, {
+      method: 'POST',
+      headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+      body: formData,
+    });
+    if (!response.ok) {
+      const data = await response.json();
+      throw new Error(data.error || 'Analysis failed');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const messages = buffer.split('\n\n');
+      buffer = messages.pop();
+      for (const message of messages) {
+        let event = 'message';
+        let data = '';
+        for (const line of message.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (data) onEvent(event, JSON.parse(data));
+      }
+    }
+  },
   getHistory: (page = 1, perPage = 10) =>
     api.get(`/detection/history?page=${page}&per_page=${perPage}`),
   getStats: () => api.get('/detection/stats'),
+  getAnalysisDetails: (id, include = 'quality,faces,frames') =>
+    api.get(`/detection/history/${id}/details?include=${include}`),
   deleteAnalysis: (id) => api.delete(`/detection/history/${id}`),
+  // Signed, short-lived URLs for <img>/<video> tags, which can't send the
+  // Authorization header; kinds are 'media' (original upload), 'thumbnail'
+  // and 'poster'. Responds with urls[id][kind]
+  getMediaUrls: (ids, kinds = 'media,thumbnail') =>
+    api.get(`/detection/history/media-urls?ids=${ids.join(',')}&kinds=${kinds}`),
 };
 
 export const adminAPI = {